@@ -7,7 +7,7 @@ from datetime import datetime, timezone
 import aiohttp
 
 from api.auth_manager import AuthenticationManager
-from utils.rate_limiter import RateLimiter
+from utils.rate_limiter import Cost, RateLimiter
 from utils.retry_handler import RetryStrategy, RetryConfig
 from utils.exceptions import GraphAPIError
 
@@ -70,7 +70,7 @@ class GraphAPIClient:
     async def get_with_retry(self, url: str, **kwargs) -> Any:
         async def _do_get():
             logger.debug(f"[DEBUG API] Starting GET request to: {url}")
-            await self.rate_limiter.acquire("simple_get")
+            await self.rate_limiter.acquire(Cost.SIMPLE_GET)
             start = time.time()
 
             # Get auth headers and merge with any provided headers
@@ -112,7 +112,7 @@ class GraphAPIClient:
 
     async def post_with_retry(self, url: str, **kwargs) -> Any:
         async def _do_post():
-            await self.rate_limiter.acquire("simple_get")
+            await self.rate_limiter.acquire(Cost.SIMPLE_GET)
             start = time.time()
 
             # Get auth headers and merge with any provided headers
@@ -141,7 +141,7 @@ class GraphAPIClient:
 
     async def batch_request(self, url: str, requests: list[dict]) -> Any:
         async def _do_batch():
-            await self.rate_limiter.acquire("batch_request")
+            await self.rate_limiter.acquire(Cost.BATCH_REQUEST)
             payload = {"requests": requests}
             start = time.time()
 
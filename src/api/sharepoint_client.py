@@ -7,7 +7,7 @@ from typing import Any
 import aiohttp
 
 from api.auth_manager import AuthenticationManager
-from utils.rate_limiter import RateLimiter
+from utils.rate_limiter import Cost, RateLimiter
 from utils.retry_handler import RetryStrategy, RetryConfig
 from utils.exceptions import SharePointAPIError
 
@@ -75,7 +75,7 @@ class SharePointAPIClient:
 
     async def get_with_retry(self, url: str, **kwargs) -> Any:
         async def _do_get():
-            await self.rate_limiter.acquire("simple_get")
+            await self.rate_limiter.acquire(Cost.SIMPLE_GET)
             start = time.time()
 
             # Get authentication token for SharePoint
@@ -136,7 +136,7 @@ class SharePointAPIClient:
 
     async def post_with_retry(self, url: str, **kwargs) -> Any:
         async def _do_post():
-            await self.rate_limiter.acquire("simple_get")
+            await self.rate_limiter.acquire(Cost.SIMPLE_GET)
             start = time.time()
 
             # Get authentication token for SharePoint
@@ -180,7 +180,7 @@ class SharePointAPIClient:
 
     async def batch_request(self, url: str, requests: list[dict]) -> Any:
         async def _do_batch():
-            await self.rate_limiter.acquire("batch_request")
+            await self.rate_limiter.acquire(Cost.BATCH_REQUEST)
             payload = {"requests": requests}
             start = time.time()
 
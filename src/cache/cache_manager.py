@@ -295,12 +295,36 @@ class CacheManager:
         return results
 
     async def batch_set(self, items: Dict[str, Any], ttl: Optional[int] = None):
-        """Set multiple values in cache."""
-        tasks = []
-        for key, value in items.items():
-            tasks.append(self.set(key, value, ttl))
+        """Set multiple values in cache.
 
-        await asyncio.gather(*tasks)
+        Database entries are written together in one transaction.
+        """
+        full_items = {self._make_key(key): value for key, value in items.items()}
+
+        for full_key, value in full_items.items():
+            self.memory_cache.set(full_key, value, ttl)
+
+        if self.redis:
+            try:
+                await asyncio.gather(*(
+                    self.redis.setex(full_key, ttl or 3600, json.dumps(value))
+                    for full_key, value in full_items.items()
+                ))
+            except Exception as e:
+                logger.error(f"Error storing in redis cache: {e}")
+
+        if self.db_repo and full_items:
+            try:
+                expires_at = None
+                if ttl:
+                    expires_at = datetime.now(timezone.utc) + timedelta(seconds=ttl)
+
+                await self.db_repo.set_cache_entries(
+                    (full_key, json.dumps(value), expires_at)
+                    for full_key, value in full_items.items()
+                )
+            except Exception as e:
+                logger.error(f"Error storing in database cache: {e}")
 
     def stats(self) -> Dict[str, Any]:
         """Get cache statistics."""
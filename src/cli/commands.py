@@ -184,7 +184,9 @@ async def _run_audit(
     # Create database repository
     db_path = config.get("db", {}).get("path", "audit.db")
     db_repo = DatabaseRepository(db_path)
-    await db_repo.initialize_database()
+    # Secondary indexes are built after the audit has loaded its data
+    await db_repo.initialize_database(defer_indexes=True)
+    await db_repo.begin_bulk_phase()
 
     # Create authentication manager
     auth_dict = config["auth"]
@@ -308,6 +310,9 @@ async def _run_audit(
                     "error_count": len(result.errors),
                 },
             )
+            await result.db_repository.end_bulk_phase()
+            await result.db_repository.finalize_indexes()
+            await result.db_repository.refresh_materialized_views(result.run_id)
 
             if result.errors:
                 output.warning(f"Audit completed with {len(result.errors)} errors")
@@ -331,11 +336,19 @@ async def _run_audit(
             # Mark run as failed
             if 'run_id_manager' in locals():
                 run_id_manager.complete_current_run("failed", str(e))
+            # Leave the database usable, but never mask the audit failure
+            try:
+                await db_repo.end_bulk_phase()
+                await db_repo.finalize_indexes()
+            except Exception:
+                logger.exception("Failed to restore database settings after audit failure")
             raise
         finally:
             # Clean up client sessions
             await graph_client.close()
             await sp_client.close()
+            # Stops the writer thread and runs PRAGMA optimize
+            await asyncio.to_thread(db_repo.close)
 
 
 def _show_dry_run_plan(config: Dict[str, Any]):
@@ -440,7 +453,7 @@ def dashboard(ctx, db_path, port, no_browser):
         ctx.exit(1)
 
     # Check if streamlit app exists
-    streamlit_app_path = Path(__file__).parent.parent / "dashboard" / "streamlit_app.py"
+    streamlit_app_path = Path(__file__).parent.parent / "dashboard" / "app.py"
     if not streamlit_app_path.exists():
         output.error(f"Dashboard app not found: {streamlit_app_path}")
         ctx.exit(1)
@@ -640,9 +653,12 @@ def health(ctx, config, check_auth, check_api, check_db):
 
                 async def test_db():
                     db_repo = DatabaseRepository(check_db)
-                    await db_repo.initialize_database()
-                    # Try a simple query
-                    await db_repo.get_audit_runs()
+                    try:
+                        await db_repo.initialize_database()
+                        # Try a simple query
+                        await db_repo.get_audit_runs()
+                    finally:
+                        db_repo.close()
 
                 asyncio.run(test_db())
             output.success("Database connectivity verified")
@@ -58,9 +58,9 @@ def load_and_merge_config(config_path: str = "config/config.json",
     if app_config.auth.certificate_password:
         config_dict["auth"]["certificate_password"] = app_config.auth.certificate_password
 
-    # Add target sites if present
+    # Add target sites if present (the CLI config works with a list)
     if app_config.target_sites:
-        config_dict["target_sites"] = app_config.target_sites
+        config_dict["target_sites"] = list(app_config.target_sites)
 
     # Merge with CLI arguments
     if cli_args:
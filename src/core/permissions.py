@@ -2,6 +2,7 @@
 
 import asyncio
 import logging
+import re
 from typing import Any, Dict, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
@@ -17,6 +18,9 @@ from utils.retry_handler import RetryStrategy, RetryConfig
 
 logger = logging.getLogger(__name__)
 
+# Login name / email markers for guest accounts
+_EXTERNAL_INDICATOR_PATTERN = re.compile(r"#ext#|#EXT#|urn:spo:guest|_external|#guest#|Guest User")
+
 
 class PrincipalType(Enum):
     """Types of security principals in SharePoint."""
@@ -773,18 +777,8 @@ class PermissionAnalyzer:
         login_name = member.get("LoginName", "") or member.get("userPrincipalName", "")
         email = member.get("Email", "") or member.get("mail", "")
 
-        external_indicators = [
-            "#ext#",
-            "#EXT#",
-            "urn:spo:guest",
-            "_external",
-            "#guest#",
-            "Guest User",
-        ]
-
-        for indicator in external_indicators:
-            if indicator in login_name or indicator in email:
-                return True
+        if _EXTERNAL_INDICATOR_PATTERN.search(login_name) or _EXTERNAL_INDICATOR_PATTERN.search(email):
+            return True
 
         # Check user type
         if member.get("userType") == "Guest":
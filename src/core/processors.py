@@ -6,7 +6,7 @@ import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Any, Dict, List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 
 from core.discovery import DiscoveryModule
 from database.repository import DatabaseRepository
@@ -14,6 +14,22 @@ from core.pipeline import PipelineContext, PipelineStage
 
 logger = logging.getLogger(__name__)
 
+# Principal name markers for guest / consumer accounts
+_EXTERNAL_USER_PATTERN = re.compile(
+    r"#ext#|_external|@gmail\.com|@outlook\.com|@hotmail\.com|@yahoo\.com",
+    re.IGNORECASE,
+)
+
+
+def _object_name_and_path(item: Dict[str, Any], item_type: str) -> Tuple[Optional[str], Optional[str]]:
+    """Display name and path stored on each permission row for its object."""
+    if item_type == "site":
+        return item.get("title"), item.get("url")
+    if item_type == "library":
+        name, site_url = item.get("name"), item.get("site_url")
+        return name, f"{site_url}/{name}" if site_url and name else None
+    return item.get("name"), item.get("server_relative_url")
+
 
 class DiscoveryStage(PipelineStage):
     """Pipeline stage for discovering raw data from APIs."""
@@ -538,11 +554,7 @@ class EnrichmentStage(PipelineStage):
 
     def _is_external_user(self, principal_name: str) -> bool:
         """Check if a user is external."""
-        external_indicators = [
-            "#ext#", "_external", "@gmail.com", "@outlook.com",
-            "@hotmail.com", "@yahoo.com"
-        ]
-        return any(indicator in principal_name.lower() for indicator in external_indicators)
+        return _EXTERNAL_USER_PATTERN.search(principal_name) is not None
 
     def _calculate_storage_metrics(self, context: PipelineContext) -> None:
         """Calculate storage-related metrics."""
@@ -566,6 +578,8 @@ class StorageStage(PipelineStage):
         super().__init__("storage")
         self.db_repo = db_repo
         self.batch_size = 1000
+        # Loads at least this large rebuild the table's indexes once afterwards
+        self.defer_indexes_threshold = 100000
 
     async def execute(self, context: PipelineContext) -> PipelineContext:
         """Save all processed data to the database."""
@@ -608,6 +622,13 @@ class StorageStage(PipelineStage):
         if not records:
             return 0
 
+        if len(records) >= self.defer_indexes_threshold:
+            total_saved = await self.db_repo.bulk_insert(
+                table_name, records, self.batch_size, defer_indexes=True
+            )
+            self.logger.info(f"Saved {total_saved} records to {table_name}")
+            return total_saved
+
         total_saved = 0
 
         for i in range(0, len(records), self.batch_size):
@@ -724,7 +745,10 @@ class DataProcessor:
             # Process file permissions if unique
             if file.get('hasUniquePermissions') and file.get('permissions'):
                 permission_records.extend(
-                    self._transform_permissions(file['permissions'], file['id'], 'file')
+                    self._transform_permissions(
+                        file['permissions'], file['id'], 'file',
+                        file.get('name'), file.get('webUrl', '')
+                    )
                 )
 
         result.file_count = len(file_records)
@@ -775,7 +799,9 @@ class DataProcessor:
                 'permission_level': perm.get('permission_level'),
                 'is_inherited': perm.get('is_inherited', True),
                 'granted_at': perm.get('granted_at'),
-                'granted_by': perm.get('granted_by')
+                'granted_by': perm.get('granted_by'),
+                'object_name': perm.get('object_name'),
+                'object_path': perm.get('object_path')
             }
             permission_records.append(permission_record)
 
@@ -785,7 +811,8 @@ class DataProcessor:
         return result
 
     def _transform_permissions(
-        self, permissions: List[Dict[str, Any]], object_id: str, object_type: str
+        self, permissions: List[Dict[str, Any]], object_id: str, object_type: str,
+        object_name: Optional[str] = None, object_path: Optional[str] = None
     ) -> List[Dict[str, Any]]:
         """Transform permission data for storage."""
         transformed = []
@@ -797,7 +824,9 @@ class DataProcessor:
                 'permission_level': perm.get('role', 'Unknown'),
                 'is_inherited': False,  # These are unique permissions
                 'granted_at': perm.get('grantedDateTime'),
-                'granted_by': perm.get('grantedBy', {}).get('user', {}).get('email')
+                'granted_by': perm.get('grantedBy', {}).get('user', {}).get('email'),
+                'object_name': object_name,
+                'object_path': object_path
             }
 
             # Handle different grantee types
@@ -926,6 +955,7 @@ class PermissionAnalysisStage(PipelineStage):
                             external_sharing_count += 1
 
                         # Convert permission set to dictionary format for storage
+                        object_name, object_path = _object_name_and_path(item, item_type)
                         for perm in permission_set.permissions:
                             permission_record = {
                                 "object_type": permission_set.object_type,
@@ -939,7 +969,9 @@ class PermissionAnalysisStage(PipelineStage):
                                 "granted_by": perm.granted_by,
                                 "inheritance_source": perm.inheritance_source,
                                 "is_external": perm.is_external,
-                                "is_anonymous_link": perm.is_anonymous_link
+                                "is_anonymous_link": perm.is_anonymous_link,
+                                "object_name": object_name,
+                                "object_path": object_path,
                             }
                             context.permissions.append(permission_record)
 
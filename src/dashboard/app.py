@@ -180,6 +180,7 @@ class SecurityAuditDashboard:
             with col1:
                 if st.button("🔄 Refresh", use_container_width=True):
                     st.cache_data.clear()
+                    st.cache_resource.clear()
                     st.rerun()
 
             with col2:
@@ -306,6 +307,18 @@ def check_and_apply_migrations(db_path: str):
                     st.error(f"❌ Failed to apply migration: {e}")
                     return False
 
+        # Generated storage columns only show up in table_xinfo
+        cursor.execute("PRAGMA table_xinfo(sites)")
+        site_columns = [row[1] for row in cursor.fetchall()]
+
+        if 'storage_utilization' not in site_columns:
+            from src.database.migrations.add_site_storage_columns import migrate_database
+            try:
+                migrate_database(db_path)
+            except Exception as e:
+                st.error(f"❌ Failed to apply migration: {e}")
+                return False
+
         return True
 
     finally:
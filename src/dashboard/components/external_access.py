@@ -59,47 +59,47 @@ class ExternalAccessComponent:
         async def _load():
             repo = DatabaseRepository(_self.db_path)
 
-            # Overall stats
-            stats = await repo.fetch_one("""
+            # One round trip: overall stats plus the side counts and the
+            # permission distribution as a JSON array
+            row = await repo.fetch_one("""
                 SELECT
                     COUNT(DISTINCT principal_id) as external_users,
                     COUNT(*) as total_permissions,
                     COUNT(DISTINCT object_id) as objects_shared,
                     COUNT(DISTINCT CASE WHEN object_type = 'site' THEN object_id END) as sites_shared,
-                    COUNT(DISTINCT CASE WHEN object_type = 'file' THEN object_id END) as files_shared
+                    COUNT(DISTINCT CASE WHEN object_type = 'file' THEN object_id END) as files_shared,
+                    (
+                        SELECT COUNT(DISTINCT f.file_id)
+                        FROM files f
+                        JOIN permissions p ON p.object_type = 'file' AND p.object_id = f.file_id
+                        WHERE p.is_external = 1 AND f.sensitivity_score >= 40
+                    ) as sensitive_files,
+                    (
+                        SELECT COUNT(*)
+                        FROM permissions
+                        WHERE is_anonymous_link = 1
+                    ) as anonymous_links,
+                    (
+                        SELECT json_group_array(json_object('permission_level', permission_level, 'count', count))
+                        FROM (
+                            SELECT permission_level, COUNT(*) as count
+                            FROM permissions
+                            WHERE is_external = 1
+                            GROUP BY permission_level
+                        )
+                    ) as permission_distribution
                 FROM permissions
                 WHERE is_external = 1
             """)
 
-            # Sensitive file access
-            sensitive = await repo.fetch_one("""
-                SELECT COUNT(DISTINCT f.file_id) as count
-                FROM files f
-                JOIN permissions p ON p.object_type = 'file' AND p.object_id = f.file_id
-                WHERE p.is_external = 1 AND f.sensitivity_score >= 40
-            """)
-
-            # Anonymous links
-            anon = await repo.fetch_one("""
-                SELECT COUNT(*) as count
-                FROM permissions
-                WHERE is_anonymous_link = 1
-            """)
-
-            # Permission distribution
-            perm_dist = await repo.fetch_all("""
-                SELECT
-                    permission_level,
-                    COUNT(*) as count
-                FROM permissions
-                WHERE is_external = 1
-                GROUP BY permission_level
-            """)
+            perm_dist = json.loads(row.pop('permission_distribution') or '[]')
+            sensitive_files = row.pop('sensitive_files')
+            anonymous_links = row.pop('anonymous_links')
 
             return {
-                'stats': stats,
-                'sensitive_files': sensitive['count'],
-                'anonymous_links': anon['count'],
+                'stats': row,
+                'sensitive_files': sensitive_files,
+                'anonymous_links': anonymous_links,
                 'permission_distribution': pd.DataFrame(perm_dist) if perm_dist else pd.DataFrame()
             }
 
@@ -16,6 +16,9 @@ import humanize
 
 from src.database.repository import DatabaseRepository
 
+_MB = 1 << 20
+_GB = 1 << 30
+
 
 class FilesComponent:
     """Comprehensive files analysis component"""
@@ -67,8 +70,9 @@ class FilesComponent:
         df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
 
         # Calculate derived metrics
-        df['size_mb'] = df['size_bytes'] / (1024 * 1024)
-        df['size_gb'] = df['size_bytes'] / (1024 * 1024 * 1024)
+        size_bytes = df['size_bytes'].to_numpy(dtype='float64', na_value=np.nan)
+        df['size_mb'] = size_bytes * (1.0 / _MB)
+        df['size_gb'] = size_bytes * (1.0 / _GB)
         df['extension'] = df['name'].str.extract(r'\.([^.]+)$')[0].str.lower()
         df['is_sensitive'] = df['sensitivity_score'] >= 40
         df['has_external_access'] = df['external_user_count'] > 0
@@ -1706,29 +1710,30 @@ class FilesComponent:
         if not duplicates.empty:
             dup_summary = duplicates.groupby(['name', 'size_bytes']).agg({
                 'file_id': 'count',
-                'site_name': lambda x: x.iloc[0]
-            }).reset_index()
-
-            for _, row in dup_summary.head(10).iterrows():
-                candidates.append({
-                    'File': row['name'],
-                    'Type': 'Duplicate',
-                    'Size (MB)': row['size_bytes'] / (1024**2),
-                    'Instances': row['file_id'],
-                    'Potential Savings (MB)': (row['file_id'] - 1) * row['size_bytes'] / (1024**2)
-                })
+                'site_name': 'first'
+            }).reset_index().head(10)
+
+            dup_size_mb = dup_summary['size_bytes'].to_numpy(dtype='float64') * (1.0 / _MB)
+            candidates.append(pd.DataFrame({
+                'File': dup_summary['name'],
+                'Type': 'Duplicate',
+                'Size (MB)': dup_size_mb,
+                'Instances': dup_summary['file_id'],
+                'Potential Savings (MB)': (dup_summary['file_id'].to_numpy() - 1) * dup_size_mb
+            }))
 
         # Add large stale files
-        for _, row in stale_files.nlargest(10, 'size_bytes').iterrows():
-            candidates.append({
-                'File': row['name'],
+        largest_stale = stale_files.nlargest(10, 'size_bytes')
+        if not largest_stale.empty:
+            candidates.append(pd.DataFrame({
+                'File': largest_stale['name'],
                 'Type': 'Stale',
-                'Size (MB)': row['size_mb'],
+                'Size (MB)': largest_stale['size_mb'],
                 'Instances': 1,
-                'Potential Savings (MB)': row['size_mb']
-            })
+                'Potential Savings (MB)': largest_stale['size_mb']
+            }))
 
         if candidates:
-            cand_df = pd.DataFrame(candidates).head(20)
+            cand_df = pd.concat(candidates, ignore_index=True).head(20)
             cand_df = cand_df.round(2)
             st.dataframe(cand_df, hide_index=True, use_container_width=True)
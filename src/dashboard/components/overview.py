@@ -8,13 +8,13 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from typing import Dict, Any, List, Tuple
+from typing import Dict, Any, List, Optional, Tuple
 import asyncio
-import numpy as np
 from datetime import datetime, timedelta
 
 from src.database.repository import DatabaseRepository
-from src.utils.sensitive_content_detector import SensitivityLevel
+
+_GB = 1 << 30
 
 
 class OverviewComponent:
@@ -133,9 +133,25 @@ class OverviewComponent:
 
         return asyncio.run(_load())
 
+    @staticmethod
+    def filter_key(filters: Optional[Dict[str, Any]]) -> Tuple[Tuple[str, Any], ...]:
+        """Canonical, hashable form of a filters dict
+
+        Unset values are dropped and items sorted, so equivalent filter states
+        map to the same cache entry and "no filters" always shares one.
+        """
+        if not filters:
+            return ()
+        return tuple(sorted((k, v) for k, v in filters.items() if v not in (None, False, "", [])))
+
     @st.cache_data(ttl=300)
-    def load_detailed_data(_self, data_type: str, filters: Dict[str, Any] = None) -> pd.DataFrame:
-        """Load detailed data for tables with filtering"""
+    def load_detailed_data(_self, data_type: str, filter_key: Tuple[Tuple[str, Any], ...] = (),
+                           run_id: Optional[str] = None) -> pd.DataFrame:
+        """Load detailed data for tables with filtering
+
+        ``filter_key`` comes from ``filter_key(filters)``. ``run_id`` only keys
+        the cache, so results refresh when a new audit lands.
+        """
         query_map = {
             'sites': """
                 SELECT
@@ -188,6 +204,17 @@ class OverviewComponent:
                 LIMIT 100
             """,
             'permission_summary': """
+                SELECT
+                    permission_level,
+                    principal_type,
+                    count,
+                    unique_principals,
+                    external_count,
+                    unique_permissions
+                FROM permission_summary
+                ORDER BY count DESC
+            """,
+            'permission_summary_live': """
                 SELECT
                     permission_level,
                     principal_type,
@@ -204,12 +231,36 @@ class OverviewComponent:
         query = query_map.get(data_type, "SELECT 1")
 
         # Apply filters if provided
+        filters = dict(filter_key)
         if filters:
             # TODO: Implement filter logic
             pass
 
+        if data_type == 'permission_summary':
+            # Materialized at the end of each audit; fall back to the live
+            # aggregation for databases written before the table existed
+            try:
+                df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
+                if not df.empty:
+                    return df
+            except Exception:
+                pass
+            query = query_map['permission_summary_live']
+
         return pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
 
+    @st.cache_data(ttl=30)
+    def _latest_run_id(_self) -> Optional[str]:
+        """Return the run ID of the most recently finished audit"""
+        try:
+            df = pd.read_sql_query(
+                "SELECT run_id FROM audit_runs WHERE end_time IS NOT NULL ORDER BY end_time DESC LIMIT 1",
+                f"sqlite:///{_self.db_path}"
+            )
+        except Exception:
+            return None
+        return None if df.empty else df.iloc[0]['run_id']
+
     def render(self):
         """Render the overview component with enhanced interactivity"""
         st.header("🔒 Security Overview Dashboard")
@@ -372,7 +423,7 @@ class OverviewComponent:
         col1, col2, col3, col4, col5 = st.columns(5)
 
         with col1:
-            total_size_gb = storage['total_size'] / (1024**3) if storage['total_size'] else 0
+            total_size_gb = storage['total_size'] / _GB if storage['total_size'] else 0
             st.metric(
                 "Total Storage",
                 f"{total_size_gb:.1f} GB",
@@ -384,7 +435,7 @@ class OverviewComponent:
             st.metric(
                 "Sensitive Data",
                 f"{sensitive_data_pct:.1f}%",
-                f"{storage['sensitive_data_size'] / (1024**3):.1f} GB" if storage['sensitive_data_size'] else "0 GB",
+                f"{storage['sensitive_data_size'] / _GB:.1f} GB" if storage['sensitive_data_size'] else "0 GB",
                 help="Percentage of storage containing sensitive data"
             )
 
@@ -713,7 +764,7 @@ class OverviewComponent:
             "Permission Summary": "permission_summary"
         }
 
-        df = self.load_detailed_data(data_type_map[table_type])
+        df = self.load_detailed_data(data_type_map[table_type], run_id=self._latest_run_id())
 
         # Apply search filter
         if search_term:
@@ -804,7 +855,7 @@ class OverviewComponent:
             risk_matrix.loc[4, 'Count'] = metrics['security']['external_permissions']  # Medium impact, medium likelihood
 
         # Create heatmap
-        pivot_df = risk_matrix.pivot(index='Impact', columns='Likelihood', values='Count')
+        pivot_df = risk_matrix.pivot(index='Impact', columns='Likelihood', values='Count').astype('int32')
 
         fig = go.Figure(data=go.Heatmap(
             z=pivot_df.values,
@@ -4,19 +4,34 @@ Comprehensive permissions analysis, management, and recommendations
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from typing import Dict, Any, List, Optional, Tuple
-import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 import numpy as np
-import networkx as nx
 import json
 
 from src.database.repository import DatabaseRepository
 
+_INT32 = np.iinfo(np.int32)
+
+
+def _shrink(df: pd.DataFrame) -> pd.DataFrame:
+    """Downcast int64 columns to int32 where the values fit
+
+    Keeps the frames Streamlit caches and ships to the browser small.
+    """
+    for col in df.select_dtypes(include='int64').columns:
+        values = df[col]
+        if values.empty or (values.min() >= _INT32.min and values.max() <= _INT32.max):
+            df[col] = values.astype('int32')
+    return df
+
 
 class PermissionsComponent:
     """Comprehensive permissions analysis component"""
@@ -113,16 +128,37 @@ class PermissionsComponent:
         df['is_admin'] = df['full_control_count'] > 10
 
         # Parse dates
-        df['first_permission_date'] = pd.to_datetime(df['first_permission_date'])
-        df['last_permission_date'] = pd.to_datetime(df['last_permission_date'])
+        df['first_permission_date'] = pd.to_datetime(df['first_permission_date'], format='ISO8601', utc=True, cache=True)
+        df['last_permission_date'] = pd.to_datetime(df['last_permission_date'], format='ISO8601', utc=True, cache=True)
         df['days_active'] = (df['last_permission_date'] - df['first_permission_date']).dt.days
 
-        return df
+        return _shrink(df)
+
+    @st.cache_data(ttl=300)
+    def load_object_permission_metrics(_self, object_type: Optional[str] = None) -> Dict[str, Any]:
+        """Load aggregate object permission counts without fetching row detail"""
+        where_clause = "WHERE object_type = ?" if object_type else ""
+        params = (object_type,) if object_type else ()
+
+        query = f"""
+            SELECT
+                COUNT(DISTINCT object_type || ':' || object_id) as total_objects,
+                COUNT(DISTINCT principal_id) as unique_principals,
+                COUNT(DISTINCT CASE WHEN is_external = 1 THEN object_type || ':' || object_id END) as external_objects,
+                COUNT(DISTINCT CASE WHEN is_anonymous_link = 1 THEN object_type || ':' || object_id END) as anonymous_objects
+            FROM permissions
+            {where_clause}
+        """
+
+        df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}", params=params)
+        return df.iloc[0].to_dict()
 
     @st.cache_data(ttl=300)
-    def load_object_permissions(_self, object_type: Optional[str] = None, limit: int = 1000) -> pd.DataFrame:
-        """Load detailed object permissions"""
-        where_clause = f"WHERE p.object_type = '{object_type}'" if object_type else ""
+    def load_object_permissions(_self, object_type: Optional[str] = None, limit: int = 1000,
+                                offset: int = 0) -> pd.DataFrame:
+        """Load detailed object permissions, one page at a time"""
+        where_clause = "WHERE p.object_type = ?" if object_type else ""
+        params = ((object_type,) if object_type else ()) + (limit, offset)
 
         query = f"""
             SELECT
@@ -135,30 +171,16 @@ class PermissionsComponent:
                 COUNT(DISTINCT CASE WHEN p.is_inherited = 0 THEN p.id END) as direct_permissions,
                 COUNT(DISTINCT CASE WHEN p.is_anonymous_link = 1 THEN p.id END) as anonymous_links,
                 GROUP_CONCAT(DISTINCT p.permission_level) as permission_levels,
-                CASE
-                    WHEN p.object_type = 'site' THEN s.title
-                    WHEN p.object_type = 'library' THEN l.name
-                    WHEN p.object_type = 'folder' THEN fo.name
-                    WHEN p.object_type = 'file' THEN fi.name
-                END as object_name,
-                CASE
-                    WHEN p.object_type = 'site' THEN s.url
-                    WHEN p.object_type = 'library' THEN l.site_url || '/' || l.name
-                    WHEN p.object_type = 'folder' THEN fo.server_relative_url
-                    WHEN p.object_type = 'file' THEN fi.server_relative_url
-                END as object_path
+                MAX(p.object_name) as object_name,
+                MAX(p.object_path) as object_path
             FROM permissions p
-            LEFT JOIN sites s ON p.object_type = 'site' AND p.object_id = s.site_id
-            LEFT JOIN libraries l ON p.object_type = 'library' AND p.object_id = l.library_id
-            LEFT JOIN folders fo ON p.object_type = 'folder' AND p.object_id = fo.folder_id
-            LEFT JOIN files fi ON p.object_type = 'file' AND p.object_id = fi.file_id
             {where_clause}
             GROUP BY p.object_type, p.object_id
             ORDER BY user_count DESC
-            LIMIT {limit}
+            LIMIT ? OFFSET ?
         """
 
-        df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
+        df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}", params=params)
 
         # Calculate permission complexity score
         df['complexity_score'] = (
@@ -169,7 +191,34 @@ class PermissionsComponent:
             df['anonymous_links'] * 10
         ).round(1)
 
-        return df
+        return _shrink(df)
+
+    @st.cache_data(ttl=300)
+    def load_permission_variety(_self, object_type: Optional[str] = None) -> pd.DataFrame:
+        """Load object counts grouped by number of distinct permission levels"""
+        where_clause = "WHERE object_type = ?" if object_type else ""
+        params = (object_type,) if object_type else ()
+
+        query = f"""
+            SELECT
+                permission_variety,
+                COUNT(*) as object_id,
+                ROUND(AVG(user_count), 1) as user_count,
+                ROUND(AVG(external_user_count), 1) as external_user_count
+            FROM (
+                SELECT
+                    COUNT(DISTINCT permission_level) as permission_variety,
+                    COUNT(DISTINCT principal_id) as user_count,
+                    COUNT(DISTINCT CASE WHEN is_external = 1 THEN principal_id END) as external_user_count
+                FROM permissions
+                {where_clause}
+                GROUP BY object_type, object_id
+            )
+            GROUP BY permission_variety
+            ORDER BY permission_variety
+        """
+
+        return pd.read_sql_query(query, f"sqlite:///{_self.db_path}", params=params)
 
     @st.cache_data(ttl=300)
     def load_permission_inheritance(_self) -> pd.DataFrame:
@@ -188,6 +237,45 @@ class PermissionsComponent:
 
         return pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
 
+    @st.cache_data(ttl=300)
+    def load_broken_inheritance(_self, limit: int = 20) -> pd.DataFrame:
+        """Load sites with the most objects that break permission inheritance"""
+        # Each child table is aggregated per site on its own and then joined once,
+        # instead of fanning files x folders x libraries out per site row.
+        query = """
+            SELECT
+                s.title as site_name,
+                s.url as site_url,
+                COALESCE(f.cnt, 0) as files_with_unique_perms,
+                COALESCE(fo.cnt, 0) as folders_with_unique_perms,
+                COALESCE(l.cnt, 0) as libraries_with_unique_perms
+            FROM sites s
+            LEFT JOIN (
+                SELECT site_id, COUNT(*) as cnt
+                FROM files
+                WHERE has_unique_permissions = 1
+                GROUP BY site_id
+            ) f ON f.site_id = s.id
+            LEFT JOIN (
+                SELECT site_id, COUNT(*) as cnt
+                FROM folders
+                WHERE has_unique_permissions = 1
+                GROUP BY site_id
+            ) fo ON fo.site_id = s.id
+            LEFT JOIN (
+                SELECT l.site_id, COUNT(DISTINCT l.library_id) as cnt
+                FROM libraries l
+                JOIN permissions p ON p.object_type = 'library' AND p.object_id = l.library_id
+                WHERE p.is_inherited = 0
+                GROUP BY l.site_id
+            ) l ON l.site_id = s.id
+            WHERE f.cnt > 0 OR fo.cnt > 0 OR l.cnt > 0
+            ORDER BY files_with_unique_perms DESC
+            LIMIT ?
+        """
+
+        return pd.read_sql_query(query, f"sqlite:///{_self.db_path}", params=(limit,))
+
     @st.cache_data(ttl=300)
     def load_permission_timeline(_self, days: int = 365) -> pd.DataFrame:
         """Load permission grant timeline"""
@@ -207,7 +295,7 @@ class PermissionsComponent:
         """
 
         df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
-        df['grant_date'] = pd.to_datetime(df['grant_date'])
+        df['grant_date'] = pd.to_datetime(df['grant_date'], format='%Y-%m-%d', cache=True)
         return df
 
     @st.cache_data(ttl=300)
@@ -233,13 +321,52 @@ class PermissionsComponent:
             ORDER BY object_count DESC
         """
 
-        return pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
+        return _shrink(pd.read_sql_query(query, f"sqlite:///{_self.db_path}"))
+
+    @st.cache_data(ttl=300)
+    def _principal_search_mask(_self, term: str) -> pd.Series:
+        """Boolean mask of principals whose name or ID contains the search term"""
+        principals_df = _self.load_principal_permissions()
+        return (
+            principals_df['principal_name'].str.contains(term, case=False, regex=False, na=False) |
+            principals_df['principal_id'].str.contains(term, case=False, regex=False, na=False)
+        )
+
+    def _prefetch(self) -> None:
+        """Warm the cached loaders used by the tabs concurrently
+
+        Every tab renders on each run, so on a cold cache the loaders would
+        otherwise run back to back. Results land in st.cache_data, so the
+        renderers pick them up as cache hits.
+        """
+        ctx = get_script_run_ctx()
+        # Arguments mirror the tab call sites so the cache keys match
+        loaders = [
+            (self.load_permissions_overview, ()),
+            (self.load_permissions_by_type, ()),
+            (self.load_permission_levels, ()),
+            (self.load_principal_permissions, ()),
+            (self.load_object_permission_metrics, (None,)),
+            (self.load_object_permissions, (None,)),
+            (self.load_permission_variety, (None,)),
+            (self.load_permission_inheritance, ()),
+            (self.load_broken_inheritance, ()),
+            (self.load_group_permissions, ()),
+        ]
+
+        with ThreadPoolExecutor(
+            max_workers=4,
+            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)
+        ) as pool:
+            for loader, args in loaders:
+                pool.submit(loader, *args)
 
     def render(self):
         """Render the permissions component"""
         st.header("🔑 Comprehensive Permissions Analysis")
 
-        # Load overview data
+        # Warm the loaders concurrently, then load overview data
+        self._prefetch()
         overview = self.load_permissions_overview()
 
         # Overview metrics
@@ -322,6 +449,70 @@ class PermissionsComponent:
         with tab7:
             self._render_recommendations()
 
+    @st.cache_data(ttl=300)
+    def _build_overview_figures(_self, by_type: pd.DataFrame, by_level: pd.DataFrame) -> Dict[str, str]:
+        """Build the overview charts and return them as Plotly JSON
+
+        Cached on the input frames, so warm reruns skip figure construction.
+        """
+        # Permissions by object type
+        by_type_fig = px.pie(
+            by_type,
+            values='permission_count',
+            names='object_type',
+            title="Permissions by Object Type",
+            hole=0.4
+        )
+        by_type_fig.update_traces(textposition='inside', textinfo='percent+label')
+
+        # Permission level distribution
+        by_level_fig = px.bar(
+            by_level,
+            x='permission_level',
+            y='count',
+            title="Permission Level Distribution",
+            color='count',
+            color_continuous_scale='Blues',
+            text='count'
+        )
+        by_level_fig.update_traces(texttemplate='%{text:,}', textposition='outside')
+
+        # External vs internal permissions
+        external_data = pd.DataFrame([
+            {'Type': 'Internal', 'Count': by_type['unique_principals'].sum() - by_type['external_users'].sum()},
+            {'Type': 'External', 'Count': by_type['external_users'].sum()}
+        ])
+
+        external_fig = px.pie(
+            external_data,
+            values='Count',
+            names='Type',
+            title="Internal vs External Access",
+            color_discrete_map={'Internal': '#3b82f6', 'External': '#ef4444'}
+        )
+
+        # Direct vs inherited permissions
+        inheritance_data = pd.DataFrame([
+            {'Type': 'Inherited', 'Count': by_type['permission_count'].sum() - by_type['direct_permissions'].sum()},
+            {'Type': 'Direct', 'Count': by_type['direct_permissions'].sum()}
+        ])
+
+        inheritance_fig = px.pie(
+            inheritance_data,
+            values='Count',
+            names='Type',
+            title="Permission Inheritance",
+            hole=0.4,
+            color_discrete_map={'Inherited': '#10b981', 'Direct': '#f59e0b'}
+        )
+
+        return {
+            'by_type': by_type_fig.to_json(),
+            'by_level': by_level_fig.to_json(),
+            'external': external_fig.to_json(),
+            'inheritance': inheritance_fig.to_json(),
+        }
+
     def _render_permissions_overview(self):
         """Render permissions overview visualizations"""
         st.subheader("📊 Permissions Distribution Overview")
@@ -331,64 +522,16 @@ class PermissionsComponent:
         by_level = self.load_permission_levels()
 
         # Create visualizations
+        figures = self._build_overview_figures(by_type, by_level)
         col1, col2 = st.columns(2)
 
         with col1:
-            # Permissions by object type
-            fig = px.pie(
-                by_type,
-                values='permission_count',
-                names='object_type',
-                title="Permissions by Object Type",
-                hole=0.4
-            )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Permission level distribution
-            fig = px.bar(
-                by_level,
-                x='permission_level',
-                y='count',
-                title="Permission Level Distribution",
-                color='count',
-                color_continuous_scale='Blues',
-                text='count'
-            )
-            fig.update_traces(texttemplate='%{text:,}', textposition='outside')
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(json.loads(figures['by_type']), use_container_width=True)
+            st.plotly_chart(json.loads(figures['by_level']), use_container_width=True)
 
         with col2:
-            # External vs internal permissions
-            external_data = pd.DataFrame([
-                {'Type': 'Internal', 'Count': by_type['unique_principals'].sum() - by_type['external_users'].sum()},
-                {'Type': 'External', 'Count': by_type['external_users'].sum()}
-            ])
-
-            fig = px.pie(
-                external_data,
-                values='Count',
-                names='Type',
-                title="Internal vs External Access",
-                color_discrete_map={'Internal': '#3b82f6', 'External': '#ef4444'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
-
-            # Direct vs inherited permissions
-            inheritance_data = pd.DataFrame([
-                {'Type': 'Inherited', 'Count': by_type['permission_count'].sum() - by_type['direct_permissions'].sum()},
-                {'Type': 'Direct', 'Count': by_type['direct_permissions'].sum()}
-            ])
-
-            fig = px.pie(
-                inheritance_data,
-                values='Count',
-                names='Type',
-                title="Permission Inheritance",
-                hole=0.4,
-                color_discrete_map={'Inherited': '#10b981', 'Direct': '#f59e0b'}
-            )
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(json.loads(figures['external']), use_container_width=True)
+            st.plotly_chart(json.loads(figures['inheritance']), use_container_width=True)
 
         # Detailed breakdown table
         st.subheader("📋 Permission Type Breakdown")
@@ -505,16 +648,15 @@ class PermissionsComponent:
         # Search functionality
         search = st.text_input("Search principals", placeholder="Enter name or ID...")
         if search:
-            principals_df = principals_df[
-                principals_df['principal_name'].str.contains(search, case=False, na=False) |
-                principals_df['principal_id'].str.contains(search, case=False, na=False)
-            ]
+            search_mask = self._principal_search_mask(search)
+            principals_df = principals_df[search_mask.loc[principals_df.index]]
 
         # Display table
         display_df = principals_df.head(50).copy()
-        display_df['type'] = display_df.apply(
-            lambda x: 'External' if x['is_external'] else x['principal_type'].title(),
-            axis=1
+        display_df['type'] = np.where(
+            display_df['is_external'].astype(bool),
+            'External',
+            display_df['principal_type'].str.title()
         )
 
         st.dataframe(
@@ -558,14 +700,24 @@ class PermissionsComponent:
         )
 
         # Load data
-        objects_df = self.load_object_permissions(
-            object_type if object_type != "All" else None
-        )
+        type_filter = object_type if object_type != "All" else None
+        object_metrics = self.load_object_permission_metrics(type_filter)
+        objects_df = self.load_object_permissions(type_filter)
 
         if objects_df.empty:
             st.info("No objects found with the selected criteria.")
             return
 
+        col1, col2, col3, col4 = st.columns(4)
+        with col1:
+            st.metric("Objects", f"{object_metrics['total_objects']:,}")
+        with col2:
+            st.metric("Unique Principals", f"{object_metrics['unique_principals']:,}")
+        with col3:
+            st.metric("Externally Shared", f"{object_metrics['external_objects']:,}")
+        with col4:
+            st.metric("Anonymous Links", f"{object_metrics['anonymous_objects']:,}")
+
         # Complexity analysis
         col1, col2 = st.columns(2)
 
@@ -627,11 +779,7 @@ class PermissionsComponent:
         # Permission variety analysis
         st.subheader("🔀 Permission Variety Analysis")
 
-        variety_stats = objects_df.groupby('permission_variety').agg({
-            'object_id': 'count',
-            'user_count': 'mean',
-            'external_user_count': 'mean'
-        }).round(1).reset_index()
+        variety_stats = self.load_permission_variety(type_filter)
 
         fig = px.bar(
             variety_stats,
@@ -647,6 +795,44 @@ class PermissionsComponent:
         fig.update_traces(texttemplate='%{text:,}')
         st.plotly_chart(fig, use_container_width=True)
 
+        # All objects, paged in SQL
+        st.subheader("📄 Object Details")
+
+        page_size = 50
+        total_pages = max((object_metrics['total_objects'] - 1) // page_size + 1, 1)
+        page = st.number_input(
+            "Page",
+            min_value=1,
+            max_value=total_pages,
+            value=1,
+            key="object_perm_page"
+        )
+        st.session_state['object_perm_offset'] = (page - 1) * page_size
+
+        page_df = self.load_object_permissions(
+            type_filter,
+            limit=page_size,
+            offset=st.session_state['object_perm_offset']
+        )
+
+        st.dataframe(
+            page_df[[
+                'object_type', 'object_name', 'object_path', 'user_count',
+                'external_user_count', 'permission_levels', 'complexity_score'
+            ]].rename(columns={
+                'object_type': 'Type',
+                'object_name': 'Name',
+                'object_path': 'Path',
+                'user_count': 'Total Users',
+                'external_user_count': 'External',
+                'permission_levels': 'Levels',
+                'complexity_score': 'Complexity'
+            }),
+            use_container_width=True,
+            hide_index=True
+        )
+        st.caption(f"Page {page} of {total_pages} | {object_metrics['total_objects']:,} objects")
+
     def _render_inheritance_analysis(self):
         """Render permission inheritance analysis"""
         st.subheader("🔄 Permission Inheritance Analysis")
@@ -718,25 +904,7 @@ class PermissionsComponent:
         st.subheader("🔗 Inheritance Chain Analysis")
 
         # Sites with broken inheritance
-        broken_inheritance_query = """
-            SELECT
-                s.title as site_name,
-                s.url as site_url,
-                COUNT(DISTINCT f.file_id) as files_with_unique_perms,
-                COUNT(DISTINCT fo.folder_id) as folders_with_unique_perms,
-                COUNT(DISTINCT l.library_id) as libraries_with_unique_perms
-            FROM sites s
-            LEFT JOIN files f ON s.id = f.site_id AND f.has_unique_permissions = 1
-            LEFT JOIN folders fo ON s.id = fo.site_id AND fo.has_unique_permissions = 1
-            LEFT JOIN libraries l ON s.id = l.site_id
-            LEFT JOIN permissions p ON p.object_type = 'library' AND p.object_id = l.library_id AND p.is_inherited = 0
-            GROUP BY s.id
-            HAVING files_with_unique_perms > 0 OR folders_with_unique_perms > 0 OR libraries_with_unique_perms > 0
-            ORDER BY files_with_unique_perms DESC
-            LIMIT 20
-        """
-
-        broken_df = pd.read_sql_query(broken_inheritance_query, f"sqlite:///{self.db_path}")
+        broken_df = self.load_broken_inheritance()
 
         if not broken_df.empty:
             st.warning(f"Found {len(broken_df)} sites with broken permission inheritance")
@@ -5,6 +5,7 @@ Comprehensive risk assessment and visualization
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
@@ -599,9 +600,10 @@ class RiskAnalysisComponent:
         st.subheader("🔍 User Risk Details")
 
         display_df = df.head(50).copy()
-        display_df['user_type'] = display_df.apply(
-            lambda x: 'External' if x['is_external'] else x['principal_type'].title(),
-            axis=1
+        display_df['user_type'] = np.where(
+            display_df['is_external'].astype(bool),
+            'External',
+            display_df['principal_type'].str.title()
         )
 
         st.dataframe(
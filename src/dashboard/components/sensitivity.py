@@ -59,8 +59,8 @@ class SensitivityComponent:
                 ORDER BY f.sensitivity_score DESC, external_users DESC
                 LIMIT {limit}
             """
-            results = await repo.fetch_all(query)
-            return pd.DataFrame(results) if results else pd.DataFrame()
+            table = await repo.fetch_arrow(query)
+            return table.to_pandas()
 
         return asyncio.run(_load())
 
@@ -80,8 +80,8 @@ class SensitivityComponent:
                 WHERE sensitivity_score > 0
                 GROUP BY sensitivity_categories
             """
-            results = await repo.fetch_all(query)
-            return pd.DataFrame(results) if results else pd.DataFrame()
+            table = await repo.fetch_arrow(query)
+            return table.to_pandas()
 
         return asyncio.run(_load())
 
@@ -103,8 +103,8 @@ class SensitivityComponent:
                 ORDER BY date DESC
                 LIMIT 90
             """
-            results = await repo.fetch_all(query)
-            return pd.DataFrame(results) if results else pd.DataFrame()
+            table = await repo.fetch_arrow(query)
+            return table.to_pandas()
 
         return asyncio.run(_load())
 
@@ -358,15 +358,8 @@ class SensitivityComponent:
             labels=['Limited', 'Moderate', 'Wide', 'Very Wide']
         )
 
-        # Create heatmap data
-        matrix_data = df.groupby(['sensitivity_level', 'access_level']).size().reset_index(name='count')
-
-        # Pivot for heatmap
-        pivot_data = matrix_data.pivot(
-            index='sensitivity_level',
-            columns='access_level',
-            values='count'
-        ).fillna(0)
+        # Count files per cell directly; counts are integral so keep them int32
+        pivot_data = pd.crosstab(df['sensitivity_level'], df['access_level']).astype('int32')
 
         # Create heatmap
         fig = px.imshow(
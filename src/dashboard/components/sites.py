@@ -7,14 +7,75 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
-from typing import Dict, Any, List, Optional
+from typing import Callable, Dict, Any, Optional, Tuple, TypeVar
 import asyncio
-from datetime import datetime, timedelta
+import json
+import logging
+import threading
+from concurrent.futures import Future
+from datetime import datetime
 import numpy as np
 
 from src.database.repository import DatabaseRepository
 
+logger = logging.getLogger(__name__)
+
+_SITE_COUNT_COLUMNS = (
+    'library_count', 'file_count', 'folder_count', 'permission_count',
+    'unique_permission_count', 'user_count', 'external_user_count', 'admin_count',
+    'sensitive_file_count', 'files_unique_perms',
+)
+# Column types for the per-site loader queries; unlisted columns stay object
+_SITE_DTYPES = {
+    'id': 'int64', 'storage_used_gb': 'float64', 'storage_utilization': 'float64',
+    'is_hub_site': 'bool', 'avg_file_size': 'float64',
+    **{column: 'int64' for column in _SITE_COUNT_COLUMNS},
+}
+
+
+@st.cache_resource
+def _get_repo(db_path: str) -> DatabaseRepository:
+    """Shared repository per database path, tuned for read-only use"""
+    repo = DatabaseRepository(db_path)
+    repo.configure_readonly()
+    return repo
+
+
+@st.cache_resource
+def _get_loop() -> asyncio.AbstractEventLoop:
+    """Long-lived event loop on a daemon thread for the async loaders"""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="sites-loader", daemon=True).start()
+    return loop
+
+
+T = TypeVar('T')
+
+# Loads currently running, keyed by (db_path, query id)
+_inflight: Dict[Tuple[str, str], Future] = {}
+_inflight_lock = threading.Lock()
+
+
+def _coalesce(key: Tuple[str, str], load: Callable[[], T]) -> T:
+    """Run load() once per key at a time; concurrent callers share its result"""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        owner = future is None
+        if owner:
+            future = _inflight[key] = Future()
+    if not owner:
+        return future.result()
+
+    try:
+        future.set_result(load())
+    except BaseException as exc:
+        future.set_exception(exc)
+        raise
+    finally:
+        with _inflight_lock:
+            del _inflight[key]
+    return future.result()
+
 
 class SitesComponent:
     """Comprehensive sites analysis component"""
@@ -23,59 +84,86 @@ class SitesComponent:
         self.db_path = db_path
         self.repo = DatabaseRepository(db_path)
 
-    @st.cache_data(ttl=300)
-    def load_sites_data(_self) -> pd.DataFrame:
-        """Load comprehensive sites data"""
-        query = """
-            SELECT
-                s.id,
-                s.site_id,
-                s.title,
-                s.url,
-                s.description,
-                s.created_at,
-                s.last_modified,
-                s.storage_used,
-                s.storage_quota,
-                s.is_hub_site,
-                s.hub_site_id,
-                COUNT(DISTINCT l.id) as library_count,
-                COUNT(DISTINCT fi.id) as file_count,
-                COUNT(DISTINCT fo.id) as folder_count,
-                COUNT(DISTINCT p.id) as permission_count,
-                COUNT(DISTINCT CASE WHEN p.is_inherited = 0 THEN p.id END) as unique_permission_count,
-                COUNT(DISTINCT p.principal_id) as user_count,
-                COUNT(DISTINCT CASE WHEN p.is_external = 1 THEN p.principal_id END) as external_user_count,
-                COUNT(DISTINCT CASE WHEN p.permission_level = 'Full Control' THEN p.principal_id END) as admin_count,
-                SUM(fi.size_bytes) as total_file_size,
-                AVG(fi.size_bytes) as avg_file_size,
-                MAX(fi.size_bytes) as max_file_size,
-                COUNT(DISTINCT CASE WHEN fi.sensitivity_score >= 40 THEN fi.id END) as sensitive_file_count,
-                COUNT(DISTINCT CASE WHEN fi.has_unique_permissions = 1 THEN fi.id END) as files_unique_perms,
-                MAX(fi.modified_at) as last_file_modified
-            FROM sites s
-            LEFT JOIN libraries l ON s.id = l.site_id
-            LEFT JOIN files fi ON s.id = fi.site_id
-            LEFT JOIN folders fo ON s.id = fo.site_id
-            LEFT JOIN permissions p ON p.object_type = 'site' AND p.object_id = s.site_id
-            GROUP BY s.id
+    def load_sites_data(self) -> pd.DataFrame:
+        """Load comprehensive sites data
+
+        Returns a copy of the cached frame, so callers may add or overwrite
+        columns freely.
         """
+        return self._load_sites_frame().copy()
+
+    @st.cache_resource(ttl=300)
+    def _load_sites_frame(_self) -> pd.DataFrame:
+        """Build the per-site frame; cached as a resource to skip pickling on hits"""
+        async def _load(repo: DatabaseRepository):
+            # Aggregate each child table per site separately and concurrently;
+            # joining them all against sites at once multiplies the rows
+            return await asyncio.gather(
+                repo.fetch_typed("""
+                    SELECT
+                        id, site_id, title, url, created_at,
+                        storage_used_gb, storage_utilization, is_hub_site, hub_site_id
+                    FROM sites
+                """, _SITE_DTYPES),
+                repo.fetch_typed("""
+                    SELECT site_id as id, COUNT(*) as library_count
+                    FROM libraries
+                    GROUP BY site_id
+                """, _SITE_DTYPES),
+                repo.fetch_typed("""
+                    SELECT
+                        site_id as id,
+                        COUNT(*) as file_count,
+                        AVG(size_bytes) as avg_file_size,
+                        COUNT(CASE WHEN sensitivity_score >= 40 THEN 1 END) as sensitive_file_count,
+                        COUNT(CASE WHEN has_unique_permissions = 1 THEN 1 END) as files_unique_perms,
+                        MAX(modified_at) as last_file_modified
+                    FROM files
+                    GROUP BY site_id
+                """, _SITE_DTYPES),
+                repo.fetch_typed("""
+                    SELECT site_id as id, COUNT(*) as folder_count
+                    FROM folders
+                    GROUP BY site_id
+                """, _SITE_DTYPES),
+                repo.fetch_typed("""
+                    SELECT
+                        s.id,
+                        COUNT(*) as permission_count,
+                        COUNT(CASE WHEN p.is_inherited = 0 THEN 1 END) as unique_permission_count,
+                        COUNT(DISTINCT p.principal_id) as user_count,
+                        COUNT(DISTINCT CASE WHEN p.is_external = 1 THEN p.principal_id END) as external_user_count,
+                        COUNT(DISTINCT CASE WHEN p.permission_level = 'Full Control' THEN p.principal_id END) as admin_count
+                    FROM permissions p
+                    JOIN sites s ON p.object_type = 'site' AND p.object_id = s.site_id
+                    GROUP BY s.id
+                """, _SITE_DTYPES),
+            )
 
-        df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
+        sites, libraries, files, folders, permissions = _coalesce(
+            (_self.db_path, 'sites_frame'),
+            lambda: asyncio.run_coroutine_threadsafe(
+                _load(_get_repo(_self.db_path)), _get_loop()
+            ).result(),
+        )
+        if not len(sites['id']):
+            return pd.DataFrame()
 
-        # Calculate derived metrics
-        if 'storage_used' in df.columns:
-            df['storage_used_gb'] = df['storage_used'] / (1024**3)
-        else:
-            df['storage_used_gb'] = 0.0
+        df = pd.DataFrame(sites)
+        for columns in (libraries, files, folders, permissions):
+            df = df.merge(pd.DataFrame(columns), on='id', how='left')
 
-        if 'total_file_size' in df.columns:
-            df['total_file_size_gb'] = df['total_file_size'] / (1024**3)
-        else:
-            df['total_file_size_gb'] = 0.0
-        storage_util = df['storage_used'] / df['storage_quota'] * 100
-        df['storage_utilization'] = storage_util.where(storage_util.notna(), 0)
+        # Sites without child rows count as zero; float stats such as
+        # avg_file_size stay NaN (fetch_typed reads NULL floats as NaN too)
+        for column in _SITE_COUNT_COLUMNS:
+            df[column] = df[column].fillna(0).astype('int64')
+
+        # Arrow-backed strings: compact buffers, vectorized str kernels, and
+        # no object-to-Arrow conversion when Streamlit ships the table
+        text_columns = df.select_dtypes(include='object').columns
+        df[text_columns] = df[text_columns].astype('string[pyarrow]')
 
+        # Calculate derived metrics (storage ones are generated columns on sites)
         # Calculate permission_complexity safely
         if 'permission_count' in df.columns and 'unique_permission_count' in df.columns:
             perm_complex = df['unique_permission_count'] / df['permission_count'] * 100
@@ -98,8 +186,77 @@ class SitesComponent:
         df.loc[df['admin_count'] > 10, 'health_score'] -= 10
         df['health_score'] = df['health_score'].clip(0, 100)
 
+        # Lower-cased "title\0url" for the inventory search; the separator
+        # keeps a match from spanning the two fields
+        df['_search_idx'] = (df['title'].fillna('') + '\x00' + df['url'].fillna('')).str.lower()
+
         return df
 
+    @st.cache_data(ttl=300)
+    def load_site_summary_metrics(_self) -> Dict[str, Any]:
+        """Load site-wide totals and counts in a single aggregate query"""
+        query = """
+            SELECT
+                COUNT(*) as total_sites,
+                COALESCE(SUM(storage_used), 0) as total_storage_used,
+                COALESCE(SUM(storage_quota), 0) as total_storage_quota,
+                COALESCE(AVG(storage_used), 0) as avg_storage_used,
+                COUNT(CASE WHEN storage_used > 107374182400 THEN 1 END) as large_sites,
+                COUNT(CASE WHEN is_hub_site = 1 THEN 1 END) as hub_count,
+                COUNT(hub_site_id) as hub_linked_count,
+                (SELECT COUNT(*) FROM files) as total_files,
+                (SELECT COUNT(*) FROM files WHERE sensitivity_score >= 40) as sensitive_files,
+                (SELECT COALESCE(SUM(size_bytes), 0) FROM files) as total_file_size
+            FROM sites
+        """
+
+        df = _coalesce(
+            (_self.db_path, 'site_summary_metrics'),
+            lambda: _get_repo(_self.db_path).fetch_dataframe(query),
+        )
+        return df.iloc[0].to_dict()
+
+    @st.cache_data(ttl=300)
+    def load_top_sites(_self, metric: str, n: int = 20) -> pd.DataFrame:
+        """Load the top N sites by storage used or by average file size"""
+        queries = {
+            'storage_used': """
+                SELECT title, storage_used_gb
+                FROM sites
+                ORDER BY storage_used DESC
+                LIMIT ?
+            """,
+            'avg_file_size': """
+                SELECT site_title as title, avg_file_size, avg_file_size / 1048576.0 as avg_file_size_mb
+                FROM storage_analytics
+                WHERE file_count > 0
+                ORDER BY avg_file_size DESC
+                LIMIT ?
+            """,
+            'avg_file_size_live': """
+                SELECT s.title, AVG(f.size_bytes) as avg_file_size, AVG(f.size_bytes) / 1048576.0 as avg_file_size_mb
+                FROM files f
+                JOIN sites s ON f.site_id = s.id
+                GROUP BY s.id
+                ORDER BY avg_file_size DESC
+                LIMIT ?
+            """,
+        }
+
+        if metric == 'avg_file_size':
+            # Materialized at the end of each audit; fall back to the live
+            # aggregation for databases written before the table existed
+            try:
+                df = _get_repo(_self.db_path).fetch_dataframe(queries[metric], (n,))
+                if not df.empty:
+                    return df
+            except pd.errors.DatabaseError as e:
+                # e.g. a storage_analytics table from an older schema
+                logger.warning("storage_analytics unreadable, using live query: %s", e)
+            metric = 'avg_file_size_live'
+
+        return _get_repo(_self.db_path).fetch_dataframe(queries[metric], (n,))
+
     @st.cache_data(ttl=300)
     def load_library_details(_self, site_id: Optional[str] = None) -> pd.DataFrame:
         """Load library details for a specific site or all sites"""
@@ -114,16 +271,11 @@ class SitesComponent:
             FROM libraries l
             JOIN sites s ON l.site_id = s.id
             LEFT JOIN files f ON l.id = f.library_id
+            WHERE ? IS NULL OR s.site_id = ?
+            GROUP BY l.id
         """
 
-        if site_id:
-            query += " WHERE s.site_id = ?"
-            df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}", params=(site_id,))
-        else:
-            query += " GROUP BY l.id"
-            df = pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
-
-        return df
+        return _get_repo(_self.db_path).fetch_dataframe(query, (site_id, site_id))
 
     @st.cache_data(ttl=300)
     def load_hub_site_relationships(_self) -> pd.DataFrame:
@@ -146,7 +298,7 @@ class SitesComponent:
             GROUP BY h.site_id, s.site_id
         """
 
-        return pd.read_sql_query(query, f"sqlite:///{_self.db_path}")
+        return _get_repo(_self.db_path).fetch_dataframe(query)
 
     def render(self):
         """Render the sites component"""
@@ -192,17 +344,18 @@ class SitesComponent:
 
     def _render_site_metrics(self, df: pd.DataFrame):
         """Render top-level site metrics"""
+        summary = self.load_site_summary_metrics()
         col1, col2, col3, col4, col5, col6 = st.columns(6)
 
         with col1:
             st.metric(
                 "Total Sites",
-                f"{len(df):,}",
+                f"{summary['total_sites']:,}",
                 help="Total number of SharePoint sites"
             )
 
         with col2:
-            total_storage_tb = df['storage_used'].sum() / (1024**4) if 'storage_used' in df else 0
+            total_storage_tb = summary['total_storage_used'] / (1024**4)
             st.metric(
                 "Total Storage",
                 f"{total_storage_tb:.2f} TB",
@@ -220,11 +373,11 @@ class SitesComponent:
             )
 
         with col4:
-            hub_count = len(df[df['is_hub_site'] == True])
+            hub_count = summary['hub_count']
             st.metric(
                 "Hub Sites",
                 f"{hub_count}",
-                f"{len(df[df['hub_site_id'].notna()]) - hub_count} associated",
+                f"{summary['hub_linked_count'] - hub_count} associated",
                 help="Hub sites and their associations"
             )
 
@@ -238,11 +391,10 @@ class SitesComponent:
             )
 
         with col6:
-            total_files = df['file_count'].sum()
             st.metric(
                 "Total Files",
-                f"{total_files:,}",
-                f"{df['sensitive_file_count'].sum():,} sensitive",
+                f"{summary['total_files']:,}",
+                f"{summary['sensitive_files']:,} sensitive",
                 help="Total files across all sites"
             )
 
@@ -283,36 +435,37 @@ class SitesComponent:
                 key="hub_filter"
             )
 
-        # Apply filters
-        filtered_df = df.copy()
+        # Apply filters: AND the predicates into one mask and slice once
+        mask = np.ones(len(df), dtype=bool)
 
         if search_term:
-            mask = (
-                filtered_df['title'].str.contains(search_term, case=False, na=False) |
-                filtered_df['url'].str.contains(search_term, case=False, na=False)
-            )
-            filtered_df = filtered_df[mask]
+            mask &= df['_search_idx'].str.contains(search_term.lower(), regex=False, na=False).to_numpy(dtype=bool)
 
+        health = df['health_score'].to_numpy()
         if health_filter == "Critical (<50)":
-            filtered_df = filtered_df[filtered_df['health_score'] < 50]
+            mask &= health < 50
         elif health_filter == "Warning (50-70)":
-            filtered_df = filtered_df[(filtered_df['health_score'] >= 50) & (filtered_df['health_score'] <= 70)]
+            mask &= (health >= 50) & (health <= 70)
         elif health_filter == "Good (>70)":
-            filtered_df = filtered_df[filtered_df['health_score'] > 70]
+            mask &= health > 70
 
+        utilization = df['storage_utilization'].to_numpy()
         if storage_filter == "Low (<50%)":
-            filtered_df = filtered_df[filtered_df['storage_utilization'] < 50]
+            mask &= utilization < 50
         elif storage_filter == "Medium (50-80%)":
-            filtered_df = filtered_df[(filtered_df['storage_utilization'] >= 50) & (filtered_df['storage_utilization'] <= 80)]
+            mask &= (utilization >= 50) & (utilization <= 80)
         elif storage_filter == "High (>80%)":
-            filtered_df = filtered_df[filtered_df['storage_utilization'] > 80]
+            mask &= utilization > 80
 
+        is_hub = df['is_hub_site'].to_numpy(dtype=bool)
         if hub_filter == "Hub Sites Only":
-            filtered_df = filtered_df[filtered_df['is_hub_site'] == True]
+            mask &= is_hub
         elif hub_filter == "Associated Sites":
-            filtered_df = filtered_df[filtered_df['hub_site_id'].notna() & (filtered_df['is_hub_site'] == False)]
+            mask &= df['hub_site_id'].notna().to_numpy() & ~is_hub
         elif hub_filter == "Standalone Sites":
-            filtered_df = filtered_df[filtered_df['hub_site_id'].isna() & (filtered_df['is_hub_site'] == False)]
+            mask &= df['hub_site_id'].isna().to_numpy() & ~is_hub
+
+        filtered_df = df[mask]
 
         # Display results count
         st.info(f"Showing {len(filtered_df)} of {len(df)} sites")
@@ -440,15 +593,66 @@ class SitesComponent:
                 if penalty > 0:
                     st.warning(f"{factor}: -{penalty:.0f} points")
 
+    @st.cache_data(ttl=300)
+    def _build_storage_figures(
+        _self, top_storage_df: pd.DataFrame, utilization: pd.Series, avg_size_df: pd.DataFrame
+    ) -> Dict[str, str]:
+        """Build the storage charts and return them as Plotly JSON
+
+        Cached on the input data, so warm reruns skip figure construction.
+        """
+        top_storage_fig = px.bar(
+            top_storage_df,
+            x='storage_used_gb',
+            y='title',
+            orientation='h',
+            title="Top 20 Sites by Storage Usage",
+            labels={'storage_used_gb': 'Storage (GB)', 'title': 'Site'},
+            color='storage_used_gb',
+            color_continuous_scale='Reds'
+        )
+        top_storage_fig.update_layout(height=600, showlegend=False)
+
+        utilization_bins = pd.cut(
+            utilization,
+            bins=[0, 25, 50, 75, 90, 100],
+            labels=['0-25%', '25-50%', '50-75%', '75-90%', '90-100%']
+        )
+        utilization_counts = utilization_bins.value_counts().sort_index()
+
+        utilization_fig = px.pie(
+            values=utilization_counts.values,
+            names=utilization_counts.index,
+            title="Storage Utilization Distribution",
+            color_discrete_sequence=px.colors.sequential.RdBu
+        )
+        utilization_fig.update_traces(textposition='inside', textinfo='percent+label')
+
+        avg_size_fig = px.bar(
+            avg_size_df,
+            x='title',
+            y='avg_file_size_mb',
+            title="Sites with Largest Average File Size",
+            labels={'avg_file_size_mb': 'Average File Size (MB)', 'title': 'Site'}
+        )
+        avg_size_fig.update_xaxes(tickangle=-45)
+
+        return {
+            'top_storage': top_storage_fig.to_json(),
+            'utilization': utilization_fig.to_json(),
+            'avg_file_size': avg_size_fig.to_json(),
+        }
+
     def _render_storage_analytics(self, df: pd.DataFrame):
         """Render storage analytics"""
         st.subheader("💾 Storage Analytics")
 
         # Storage overview metrics
+        summary = self.load_site_summary_metrics()
         col1, col2, col3, col4 = st.columns(4)
 
-        total_storage = df['storage_used'].sum() / (1024**4) if 'storage_used' in df else 0
-        total_quota = df['storage_quota'].sum() / (1024**4) if 'storage_quota' in df else 0
+        total_storage = summary['total_storage_used'] / (1024**4)
+        total_quota = summary['total_storage_quota'] / (1024**4)
 
         with col1:
             st.metric(
@@ -460,64 +664,41 @@ class SitesComponent:
         with col2:
             st.metric(
                 "Average Site Storage",
-                f"{df['storage_used_gb'].mean():.2f} GB",
+                f"{summary['avg_storage_used'] / (1024**3):.2f} GB",
                 help="Average storage per site"
             )
 
         with col3:
-            large_sites = len(df[df['storage_used_gb'] > 100])
+            large_sites = summary['large_sites']
             st.metric(
                 "Large Sites (>100GB)",
                 f"{large_sites}",
-                f"{large_sites / len(df) * 100:.1f}% of sites" if len(df) > 0 else "0%"
+                f"{large_sites / summary['total_sites'] * 100:.1f}% of sites" if summary['total_sites'] > 0 else "0%"
             )
 
         with col4:
             st.metric(
                 "Storage Efficiency",
-                f"{df['total_file_size'].sum() / df['storage_used'].sum() * 100:.1f}%" if df['storage_used'].sum() > 0 else "N/A",
+                f"{summary['total_file_size'] / summary['total_storage_used'] * 100:.1f}%" if summary['total_storage_used'] > 0 else "N/A",
                 help="Actual file size vs allocated storage"
             )
 
+        figures = self._build_storage_figures(
+            self.load_top_sites('storage_used', 20),
+            df['storage_utilization'],
+            self.load_top_sites('avg_file_size', 15),
+        )
+
         # Storage distribution charts
         col1, col2 = st.columns(2)
 
         with col1:
             # Storage by site - top 20
-            # Ensure storage_used_gb is numeric
-            df['storage_used_gb'] = pd.to_numeric(df['storage_used_gb'], errors='coerce').fillna(0)
-            top_storage_df = df.nlargest(20, 'storage_used_gb')[['title', 'storage_used_gb']]
-
-            fig = px.bar(
-                top_storage_df,
-                x='storage_used_gb',
-                y='title',
-                orientation='h',
-                title="Top 20 Sites by Storage Usage",
-                labels={'storage_used_gb': 'Storage (GB)', 'title': 'Site'},
-                color='storage_used_gb',
-                color_continuous_scale='Reds'
-            )
-            fig.update_layout(height=600, showlegend=False)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(json.loads(figures['top_storage']), use_container_width=True)
 
         with col2:
             # Storage utilization distribution
-            utilization_bins = pd.cut(
-                df['storage_utilization'],
-                bins=[0, 25, 50, 75, 90, 100],
-                labels=['0-25%', '25-50%', '50-75%', '75-90%', '90-100%']
-            )
-            utilization_counts = utilization_bins.value_counts().sort_index()
-
-            fig = px.pie(
-                values=utilization_counts.values,
-                names=utilization_counts.index,
-                title="Storage Utilization Distribution",
-                color_discrete_sequence=px.colors.sequential.RdBu
-            )
-            fig.update_traces(textposition='inside', textinfo='percent+label')
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(json.loads(figures['utilization']), use_container_width=True)
 
         # File size analysis
         st.markdown("### 📁 File Size Analysis")
@@ -526,20 +707,7 @@ class SitesComponent:
 
         with col1:
             # Average file size by site
-            # Ensure avg_file_size is numeric
-            df['avg_file_size'] = pd.to_numeric(df['avg_file_size'], errors='coerce').fillna(0)
-            avg_size_df = df.nlargest(15, 'avg_file_size')[['title', 'avg_file_size']]
-            avg_size_df['avg_file_size_mb'] = avg_size_df['avg_file_size'] / (1024 * 1024)
-
-            fig = px.bar(
-                avg_size_df,
-                x='title',
-                y='avg_file_size_mb',
-                title="Sites with Largest Average File Size",
-                labels={'avg_file_size_mb': 'Average File Size (MB)', 'title': 'Site'}
-            )
-            fig.update_xaxes(tickangle=-45)
-            st.plotly_chart(fig, use_container_width=True)
+            st.plotly_chart(json.loads(figures['avg_file_size']), use_container_width=True)
 
         with col2:
             # Storage growth projection (mock data for demonstration)
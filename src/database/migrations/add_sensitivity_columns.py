@@ -13,6 +13,12 @@ def migrate_database(db_path: str) -> None:
     cursor = conn.cursor()
 
     try:
+        # Same journal settings as the audit writer; then apply all DDL in
+        # one transaction so it lands with a single sync or not at all
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("BEGIN IMMEDIATE")
+
         # Check if columns already exist
         cursor.execute("PRAGMA table_info(files)")
         existing_columns = [row[1] for row in cursor.fetchall()]
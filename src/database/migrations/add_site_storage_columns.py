@@ -0,0 +1,87 @@
+"""
+Migration to add computed storage columns to the sites table
+"""
+
+import sqlite3
+
+# VIRTUAL generated columns are evaluated on read, so existing rows need no backfill
+STORAGE_COLUMNS = {
+    'storage_used_gb': "REAL GENERATED ALWAYS AS (COALESCE(storage_used, 0) / 1073741824.0) VIRTUAL",
+    'storage_utilization': (
+        "REAL GENERATED ALWAYS AS ("
+        "CASE WHEN storage_quota > 0 THEN COALESCE(storage_used, 0) * 100.0 / storage_quota ELSE 0 END"
+        ") VIRTUAL"
+    ),
+}
+
+
+def migrate_database(db_path: str) -> None:
+    """Add generated storage columns to the sites table"""
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("BEGIN IMMEDIATE")
+
+        # table_info hides generated columns; table_xinfo lists them
+        cursor.execute("PRAGMA table_xinfo(sites)")
+        existing_columns = [row[1] for row in cursor.fetchall()]
+
+        for column, definition in STORAGE_COLUMNS.items():
+            if column not in existing_columns:
+                print(f"Adding {column} to sites table...")
+                cursor.execute(f"ALTER TABLE sites ADD COLUMN {column} {definition};")
+
+        conn.commit()
+        print("Site storage migration completed successfully")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error during migration: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+def rollback_migration(db_path: str) -> None:
+    """Rollback the site storage migration"""
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
+
+    try:
+        cursor.execute("PRAGMA table_xinfo(sites)")
+        existing_columns = [row[1] for row in cursor.fetchall()]
+
+        # Generated columns can be dropped directly (SQLite 3.35+)
+        for column in STORAGE_COLUMNS:
+            if column in existing_columns:
+                cursor.execute(f"ALTER TABLE sites DROP COLUMN {column};")
+
+        conn.commit()
+        print("Site storage migration rolled back")
+
+    except Exception as e:
+        conn.rollback()
+        print(f"Error during rollback: {e}")
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    import sys
+
+    if len(sys.argv) < 2:
+        print("Usage: python add_site_storage_columns.py <database_path> [rollback]")
+        sys.exit(1)
+
+    db_path = sys.argv[1]
+
+    if len(sys.argv) > 2 and sys.argv[2] == "rollback":
+        rollback_migration(db_path)
+    else:
+        migrate_database(db_path)
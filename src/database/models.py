@@ -22,7 +22,11 @@ SCHEMA_STATEMENTS = [
         storage_quota BIGINT,
         is_hub_site BOOLEAN DEFAULT FALSE,
         hub_site_id TEXT,
-        last_modified TIMESTAMP
+        last_modified TIMESTAMP,
+        storage_used_gb REAL GENERATED ALWAYS AS (COALESCE(storage_used, 0) / 1073741824.0) VIRTUAL,
+        storage_utilization REAL GENERATED ALWAYS AS (
+            CASE WHEN storage_quota > 0 THEN COALESCE(storage_used, 0) * 100.0 / storage_quota ELSE 0 END
+        ) VIRTUAL
     );""",
     """CREATE TABLE IF NOT EXISTS libraries (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -110,7 +114,9 @@ SCHEMA_STATEMENTS = [
         granted_by TEXT,
         inheritance_source TEXT,
         is_external BOOLEAN DEFAULT FALSE,
-        is_anonymous_link BOOLEAN DEFAULT FALSE
+        is_anonymous_link BOOLEAN DEFAULT FALSE,
+        object_name TEXT,
+        object_path TEXT
     );""",
     """CREATE TABLE IF NOT EXISTS groups (
         id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -151,8 +157,8 @@ SCHEMA_STATEMENTS = [
         id INTEGER PRIMARY KEY AUTOINCREMENT,
         run_id INTEGER REFERENCES audit_runs(id),
         checkpoint_type TEXT NOT NULL,
-        checkpoint_data TEXT NOT NULL,
-        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        checkpoint_data BLOB NOT NULL,
+        created_at INTEGER DEFAULT (CAST(strftime('%s', 'now') AS INTEGER))
     );""",
     """CREATE TABLE IF NOT EXISTS cache_entries (
         cache_key TEXT PRIMARY KEY,
@@ -170,36 +176,187 @@ SCHEMA_STATEMENTS = [
         categories_found TEXT,
         last_updated TIMESTAMP DEFAULT CURRENT_TIMESTAMP
     );""",
+    """CREATE TABLE IF NOT EXISTS permission_summary (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT,
+        permission_level TEXT,
+        principal_type TEXT,
+        count INTEGER DEFAULT 0,
+        unique_principals INTEGER DEFAULT 0,
+        external_count INTEGER DEFAULT 0,
+        unique_permissions INTEGER DEFAULT 0,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    """CREATE TABLE IF NOT EXISTS storage_analytics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id TEXT,
+        site_title TEXT,
+        site_url TEXT,
+        library_count INTEGER DEFAULT 0,
+        file_count INTEGER DEFAULT 0,
+        total_size_bytes BIGINT,
+        avg_file_size REAL,
+        max_file_size BIGINT,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    """CREATE TABLE IF NOT EXISTS mv_permission_summary (
+        object_type TEXT,
+        object_id TEXT,
+        principal_type TEXT,
+        principal_id TEXT,
+        principal_name TEXT,
+        permission_level TEXT,
+        is_inherited BOOLEAN,
+        is_external BOOLEAN,
+        is_anonymous_link BOOLEAN,
+        object_name TEXT,
+        object_path TEXT
+    );""",
+    # One row marking which permissions mv_permission_summary was built from
+    """CREATE TABLE IF NOT EXISTS mv_refresh_state (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        run_id TEXT,
+        max_permission_id INTEGER,
+        refreshed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    );""",
+    # New rows raise MAX(permissions.id); deletes and in-place updates
+    # cannot, so they clear the marker instead
+    """CREATE TRIGGER IF NOT EXISTS trg_permissions_delete_mv_stale
+    AFTER DELETE ON permissions BEGIN DELETE FROM mv_refresh_state; END;""",
+    """CREATE TRIGGER IF NOT EXISTS trg_permissions_update_mv_stale
+    AFTER UPDATE ON permissions BEGIN DELETE FROM mv_refresh_state; END;""",
 ]
 
+# Serves get_latest_checkpoint (which names it with INDEXED BY), so it is
+# created with the tables rather than deferred with the other indexes. id
+# breaks ties between checkpoints saved within the same second; the index
+# it replaces, which lacked it, is dropped from older databases.
+CHECKPOINT_LOOKUP_INDEX = (
+    "DROP INDEX IF EXISTS idx_checkpoints_lookup;\n"
+    "CREATE INDEX IF NOT EXISTS idx_checkpoints_latest"
+    " ON audit_checkpoints (run_id, checkpoint_type, created_at DESC, id DESC);"
+)
+
+# Converts checkpoint timestamps written as CURRENT_TIMESTAMP text to unix seconds
+CHECKPOINT_EPOCH_UPGRADE = """
+    UPDATE audit_checkpoints
+    SET created_at = CAST(strftime('%s', created_at) AS INTEGER)
+    WHERE typeof(created_at) = 'text'
+"""
+
 INDEX_STATEMENTS = [
     "CREATE INDEX IF NOT EXISTS idx_sites_tenant ON sites (tenant_id);",
     "CREATE INDEX IF NOT EXISTS idx_sites_hub ON sites (hub_site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_sites_storage ON sites (storage_used DESC);",
     "CREATE INDEX IF NOT EXISTS idx_libraries_site ON libraries (site_id);",
     "CREATE INDEX IF NOT EXISTS idx_folders_library ON folders (library_id);",
     "CREATE INDEX IF NOT EXISTS idx_folders_parent ON folders (parent_folder_id);",
     "CREATE INDEX IF NOT EXISTS idx_folders_permissions ON folders (has_unique_permissions);",
     "CREATE INDEX IF NOT EXISTS idx_folders_site ON folders (site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_folders_unique_site ON folders (has_unique_permissions, site_id);",
     "CREATE INDEX IF NOT EXISTS idx_files_folder ON files (folder_id);",
     "CREATE INDEX IF NOT EXISTS idx_files_library ON files (library_id);",
     "CREATE INDEX IF NOT EXISTS idx_files_permissions ON files (has_unique_permissions);",
     "CREATE INDEX IF NOT EXISTS idx_files_site ON files (site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_files_unique_site ON files (has_unique_permissions, site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_files_site_stats ON files (site_id, size_bytes, sensitivity_score, has_unique_permissions, modified_at);",
     "CREATE INDEX IF NOT EXISTS idx_files_size ON files (size_bytes);",
     "CREATE INDEX IF NOT EXISTS idx_files_modified ON files (modified_at);",
     "CREATE INDEX IF NOT EXISTS idx_files_sensitivity ON files (sensitivity_score DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_files_site_lib_mod ON files (site_id, library_id, modified_at DESC);",
     "CREATE INDEX IF NOT EXISTS idx_permissions_object ON permissions (object_type, object_id);",
     "CREATE INDEX IF NOT EXISTS idx_permissions_principal ON permissions (principal_type, principal_id);",
     "CREATE INDEX IF NOT EXISTS idx_permissions_level ON permissions (permission_level);",
     "CREATE INDEX IF NOT EXISTS idx_permissions_inherited ON permissions (is_inherited);",
+    "CREATE INDEX IF NOT EXISTS idx_perm_obj_princ ON permissions (object_type, principal_type, is_external, is_inherited, id DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_permissions_external ON permissions (principal_id, object_type, object_id, is_external) WHERE is_external = 1;",
+    "CREATE INDEX IF NOT EXISTS idx_permissions_anonymous ON permissions (object_type, object_id, is_anonymous_link) WHERE is_anonymous_link = 1;",
     "CREATE INDEX IF NOT EXISTS idx_groups_site ON groups (site_id);",
     "CREATE INDEX IF NOT EXISTS idx_group_members_group ON group_members (group_id);",
     "CREATE INDEX IF NOT EXISTS idx_group_members_user ON group_members (user_id);",
     "CREATE INDEX IF NOT EXISTS idx_audit_runs_tenant ON audit_runs (tenant_id);",
     "CREATE INDEX IF NOT EXISTS idx_audit_runs_status ON audit_runs (status);",
     "CREATE INDEX IF NOT EXISTS idx_checkpoints_run ON audit_checkpoints (run_id);",
+    "CREATE INDEX IF NOT EXISTS idx_checkpoints_created ON audit_checkpoints (created_at);",
     "CREATE INDEX IF NOT EXISTS idx_cache_expires ON cache_entries (expires_at);",
+    "CREATE INDEX IF NOT EXISTS idx_permsum_count ON permission_summary (count DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_mv_permsum_type_external ON mv_permission_summary (object_type, is_external);",
 ]
 
+# Rebuilds the materialized permission_summary table from permissions
+PERMISSION_SUMMARY_REFRESH = """
+    INSERT INTO permission_summary (
+        run_id, permission_level, principal_type, count,
+        unique_principals, external_count, unique_permissions
+    )
+    SELECT
+        ?,
+        permission_level,
+        principal_type,
+        COUNT(*),
+        COUNT(DISTINCT principal_id),
+        COUNT(CASE WHEN is_external = 1 THEN 1 END),
+        COUNT(CASE WHEN is_inherited = 0 THEN 1 END)
+    FROM permissions
+    GROUP BY permission_level, principal_type
+"""
+
+# Rebuilds the materialized storage_analytics table from vw_storage_analytics
+STORAGE_ANALYTICS_REFRESH = """
+    INSERT INTO storage_analytics (
+        run_id, site_title, site_url, library_count, file_count,
+        total_size_bytes, avg_file_size, max_file_size
+    )
+    SELECT
+        ?,
+        site_title,
+        site_url,
+        library_count,
+        file_count,
+        total_size_bytes,
+        avg_file_size,
+        max_file_size
+    FROM vw_storage_analytics
+"""
+
+# Rebuilds mv_permission_summary, the materialized copy of vw_permission_summary
+MV_PERMISSION_SUMMARY_REFRESH = """
+    INSERT INTO mv_permission_summary (
+        object_type, object_id, principal_type, principal_id, principal_name,
+        permission_level, is_inherited, is_external, is_anonymous_link,
+        object_name, object_path
+    )
+    SELECT
+        object_type, object_id, principal_type, principal_id, principal_name,
+        permission_level, is_inherited, is_external, is_anonymous_link,
+        object_name, object_path
+    FROM vw_permission_summary
+"""
+
+# One-off fill of object_name / object_path on rows written before those
+# columns existed, resolved from the object tables as the old views did
+PERMISSION_OBJECT_BACKFILL = """
+    UPDATE permissions AS p
+    SET object_name = o.name, object_path = o.path
+    FROM (
+        SELECT 'site' AS object_type, site_id AS object_id, title AS name, url AS path FROM sites
+        UNION ALL
+        SELECT 'library', library_id, name, site_url || '/' || name FROM libraries
+        UNION ALL
+        SELECT 'folder', folder_id, name, server_relative_url FROM folders
+        UNION ALL
+        SELECT 'file', file_id, name, server_relative_url FROM files
+    ) AS o
+    WHERE p.object_type = o.object_type AND p.object_id = o.object_id
+        AND p.object_name IS NULL AND p.object_path IS NULL
+"""
+
+# Records the permissions a refresh of mv_permission_summary covered
+MV_REFRESH_STATE_UPDATE = """
+    INSERT OR REPLACE INTO mv_refresh_state (id, run_id, max_permission_id, refreshed_at)
+    VALUES (1, ?, (SELECT MAX(id) FROM permissions), CURRENT_TIMESTAMP)
+"""
+
 VIEW_STATEMENTS = [
     """CREATE VIEW IF NOT EXISTS vw_permission_summary AS
     SELECT
@@ -212,23 +369,9 @@ VIEW_STATEMENTS = [
         p.is_inherited,
         p.is_external,
         p.is_anonymous_link,
-        CASE
-            WHEN p.object_type = 'site' THEN s.title
-            WHEN p.object_type = 'library' THEN l.name
-            WHEN p.object_type = 'folder' THEN fo.name
-            WHEN p.object_type = 'file' THEN fi.name
-        END as object_name,
-        CASE
-            WHEN p.object_type = 'site' THEN s.url
-            WHEN p.object_type = 'library' THEN l.site_url || '/' || l.name
-            WHEN p.object_type = 'folder' THEN fo.server_relative_url
-            WHEN p.object_type = 'file' THEN fi.server_relative_url
-        END as object_path
-    FROM permissions p
-    LEFT JOIN sites s ON p.object_type = 'site' AND p.object_id = s.site_id
-    LEFT JOIN libraries l ON p.object_type = 'library' AND p.object_id = l.library_id
-    LEFT JOIN folders fo ON p.object_type = 'folder' AND p.object_id = fo.folder_id
-    LEFT JOIN files fi ON p.object_type = 'file' AND p.object_id = fi.file_id;""",
+        p.object_name,
+        p.object_path
+    FROM permissions p;""",
     """CREATE VIEW IF NOT EXISTS vw_storage_analytics AS
     SELECT
         s.title as site_title,
@@ -245,23 +388,8 @@ VIEW_STATEMENTS = [
     """CREATE VIEW IF NOT EXISTS vw_external_permissions AS
     SELECT
         p.*,
-        CASE
-            WHEN p.object_type = 'site' THEN s.url
-            WHEN p.object_type = 'library' THEN l.site_url || '/' || l.name
-            WHEN p.object_type = 'folder' THEN fo.server_relative_url
-            WHEN p.object_type = 'file' THEN fi.server_relative_url
-        END as object_url,
-        CASE
-            WHEN p.object_type = 'site' THEN s.title
-            WHEN p.object_type = 'library' THEN l.name
-            WHEN p.object_type = 'folder' THEN fo.name
-            WHEN p.object_type = 'file' THEN fi.name
-        END as object_name
+        p.object_path as object_url
     FROM permissions p
-    LEFT JOIN sites s ON p.object_type = 'site' AND p.object_id = s.site_id
-    LEFT JOIN libraries l ON p.object_type = 'library' AND p.object_id = l.library_id
-    LEFT JOIN folders fo ON p.object_type = 'folder' AND p.object_id = fo.folder_id
-    LEFT JOIN files fi ON p.object_type = 'file' AND p.object_id = fi.file_id
     WHERE p.is_external = TRUE OR p.is_anonymous_link = TRUE;""",
     """CREATE VIEW IF NOT EXISTS vw_sensitive_files AS
     SELECT
@@ -293,6 +421,8 @@ MIGRATION_STATEMENTS = [
     "ALTER TABLE permissions ADD COLUMN inheritance_source TEXT;",
     "ALTER TABLE permissions ADD COLUMN is_external BOOLEAN DEFAULT FALSE;",
     "ALTER TABLE permissions ADD COLUMN is_anonymous_link BOOLEAN DEFAULT FALSE;",
+    "ALTER TABLE permissions ADD COLUMN object_name TEXT;",
+    "ALTER TABLE permissions ADD COLUMN object_path TEXT;",
     "ALTER TABLE group_members ADD COLUMN user_name TEXT;",
     "ALTER TABLE group_members ADD COLUMN user_email TEXT;",
 ]
@@ -4,46 +4,47 @@ import sqlite3
 import sys
 from pathlib import Path
 
-def add_performance_indexes(db_path: str):
-    """Add additional indexes to improve dashboard query performance."""
+# Composite indexes for common dashboard queries
+PERFORMANCE_INDEXES = [
+    # Permissions table composite indexes
+    "CREATE INDEX IF NOT EXISTS idx_permissions_composite_object ON permissions (object_type, object_id, principal_type, permission_level);",
+    "CREATE INDEX IF NOT EXISTS idx_permissions_composite_principal ON permissions (principal_type, principal_id, object_type);",
+    "CREATE INDEX IF NOT EXISTS idx_permissions_external_filter ON permissions (is_external, object_type, principal_type);",
+    "CREATE INDEX IF NOT EXISTS idx_permissions_inherited_filter ON permissions (is_inherited, object_type);",
 
-    conn = sqlite3.connect(db_path)
-    cursor = conn.cursor()
+    # Files table composite indexes
+    "CREATE INDEX IF NOT EXISTS idx_files_composite_site ON files (site_id, modified_at DESC);",
+    "CREATE INDEX IF NOT EXISTS idx_files_composite_size ON files (size_bytes DESC, site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_files_content_type ON files (content_type, site_id);",
 
-    # Composite indexes for common dashboard queries
-    indexes = [
-        # Permissions table composite indexes
-        "CREATE INDEX IF NOT EXISTS idx_permissions_composite_object ON permissions (object_type, object_id, principal_type, permission_level);",
-        "CREATE INDEX IF NOT EXISTS idx_permissions_composite_principal ON permissions (principal_type, principal_id, object_type);",
-        "CREATE INDEX IF NOT EXISTS idx_permissions_external_filter ON permissions (is_external, object_type, principal_type);",
-        "CREATE INDEX IF NOT EXISTS idx_permissions_inherited_filter ON permissions (is_inherited, object_type);",
+    # Folders table composite indexes
+    "CREATE INDEX IF NOT EXISTS idx_folders_composite_site ON folders (site_id, has_unique_permissions);",
 
-        # Files table composite indexes
-        "CREATE INDEX IF NOT EXISTS idx_files_composite_site ON files (site_id, modified_at DESC);",
-        "CREATE INDEX IF NOT EXISTS idx_files_composite_size ON files (size_bytes DESC, site_id);",
-        "CREATE INDEX IF NOT EXISTS idx_files_content_type ON files (content_type, site_id);",
+    # Libraries table composite indexes
+    "CREATE INDEX IF NOT EXISTS idx_libraries_composite_site ON libraries (site_id, item_count DESC);",
 
-        # Folders table composite indexes
-        "CREATE INDEX IF NOT EXISTS idx_folders_composite_site ON folders (site_id, has_unique_permissions);",
+    # Additional indexes for JOIN operations
+    "CREATE INDEX IF NOT EXISTS idx_sites_site_id ON sites (site_id);",
+    "CREATE INDEX IF NOT EXISTS idx_libraries_library_id ON libraries (library_id);",
+    "CREATE INDEX IF NOT EXISTS idx_folders_folder_id ON folders (folder_id);",
+    "CREATE INDEX IF NOT EXISTS idx_files_file_id ON files (file_id);",
+]
 
-        # Libraries table composite indexes
-        "CREATE INDEX IF NOT EXISTS idx_libraries_composite_site ON libraries (site_id, item_count DESC);",
 
-        # Additional indexes for JOIN operations
-        "CREATE INDEX IF NOT EXISTS idx_sites_site_id ON sites (site_id);",
-        "CREATE INDEX IF NOT EXISTS idx_libraries_library_id ON libraries (library_id);",
-        "CREATE INDEX IF NOT EXISTS idx_folders_folder_id ON folders (folder_id);",
-        "CREATE INDEX IF NOT EXISTS idx_files_file_id ON files (file_id);",
-    ]
+def add_performance_indexes(db_path: str):
+    """Add additional indexes to improve dashboard query performance."""
+
+    conn = sqlite3.connect(db_path)
+    cursor = conn.cursor()
 
     print(f"Adding performance indexes to {db_path}...")
 
-    for idx, index_sql in enumerate(indexes, 1):
+    for idx, index_sql in enumerate(PERFORMANCE_INDEXES, 1):
         try:
             cursor.execute(index_sql)
-            print(f"✓ Index {idx}/{len(indexes)} created")
+            print(f"✓ Index {idx}/{len(PERFORMANCE_INDEXES)} created")
         except Exception as e:
-            print(f"✗ Index {idx}/{len(indexes)} failed: {e}")
+            print(f"✗ Index {idx}/{len(PERFORMANCE_INDEXES)} failed: {e}")
 
     # Analyze the database to update statistics
     print("\nAnalyzing database statistics...")
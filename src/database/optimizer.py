@@ -1,6 +1,22 @@
 import asyncio
+import logging
+import os
 import sqlite3
 
+logger = logging.getLogger(__name__)
+
+# Per-connection settings; SQLite forgets these when a connection closes
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-131072",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA wal_autocheckpoint=10000",
+    "PRAGMA journal_size_limit=134217728",
+)
+
+PAGE_SIZE = 8192
+
 
 class DatabaseOptimizer:
     """Optimizes SQLite database settings."""
@@ -13,11 +29,27 @@ class DatabaseOptimizer:
 
     def _apply_pragmas(self) -> None:
         with sqlite3.connect(self.db_path) as db:
+            # page_size must be set before the first table is created
+            db.execute(f"PRAGMA page_size={PAGE_SIZE}")
+            current = db.execute("PRAGMA page_size").fetchone()[0]
+            if current != PAGE_SIZE:
+                self._rebuild_with_page_size(db, current)
             db.execute("PRAGMA journal_mode=WAL")
-            db.execute("PRAGMA synchronous=NORMAL")
-            db.execute("PRAGMA cache_size=-64000")
-            db.execute("PRAGMA temp_store=MEMORY")
-            db.execute("PRAGMA mmap_size=268435456")
-            db.execute("PRAGMA page_size=4096")
+            for pragma in CONNECTION_PRAGMAS:
+                db.execute(pragma)
             db.commit()
 
+    def _rebuild_with_page_size(self, db: sqlite3.Connection, current: int) -> None:
+        """One-off VACUUM of an existing file onto ``PAGE_SIZE`` pages.
+
+        Runs before any pooled connection is opened; VACUUM cannot change the
+        page size in WAL mode, so the journal is switched out and back.
+        """
+        size_before = os.path.getsize(self.db_path)
+        db.execute("PRAGMA journal_mode=DELETE")
+        db.execute(f"PRAGMA page_size={PAGE_SIZE}")
+        db.execute("VACUUM")
+        logger.info(
+            "Rebuilt %s from %d to %d byte pages (%d -> %d bytes)",
+            self.db_path, current, PAGE_SIZE, size_before, os.path.getsize(self.db_path),
+        )
@@ -3,135 +3,733 @@ from __future__ import annotations
 import asyncio
 import json
 import logging
+import operator
+import queue
+import re
 import sqlite3
-from contextlib import asynccontextmanager
+import threading
+import time
+import zlib
+from contextlib import asynccontextmanager, contextmanager
+from functools import lru_cache
+from itertools import chain, islice
 from pathlib import Path
-from typing import Any, Iterable, Mapping, Optional, List, Dict, Tuple
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Iterable, Iterator, Mapping, Optional, List, Dict, Tuple
 from datetime import datetime, timezone
 
-from .models import SCHEMA_STATEMENTS, INDEX_STATEMENTS, VIEW_STATEMENTS
-from .optimizer import DatabaseOptimizer
+try:
+    import pyarrow as pa
+except ImportError:
+    # pyarrow ships with the dashboard extras; only fetch_arrow needs it
+    pa = None
+
+try:
+    import numpy as np
+except ImportError:
+    # numpy arrives with pandas; only fetch_typed needs it
+    np = None
+
+try:
+    import orjson
+except ImportError:
+    # Optional speedup for checkpoint serialization
+    orjson = None
+
+if TYPE_CHECKING:
+    import pandas as pd
+
+from .models import (
+    CHECKPOINT_EPOCH_UPGRADE,
+    CHECKPOINT_LOOKUP_INDEX,
+    SCHEMA_STATEMENTS,
+    INDEX_STATEMENTS,
+    VIEW_STATEMENTS,
+    MIGRATION_STATEMENTS,
+    MV_PERMISSION_SUMMARY_REFRESH,
+    MV_REFRESH_STATE_UPDATE,
+    PERMISSION_OBJECT_BACKFILL,
+    PERMISSION_SUMMARY_REFRESH,
+    STORAGE_ANALYTICS_REFRESH,
+)
+from .optimize_indexes import PERFORMANCE_INDEXES
+from .optimizer import CONNECTION_PRAGMAS, DatabaseOptimizer
 
 logger = logging.getLogger(__name__)
 
+# Bound parameters allowed per statement (SQLITE_MAX_VARIABLE_NUMBER)
+_MAX_VARIABLES = 32766 if sqlite3.sqlite_version_info >= (3, 32, 0) else 999
+
+# Statements that change the schema and so invalidate cached lookups
+_DDL = re.compile(r"\s*(CREATE|ALTER|DROP)\b", re.IGNORECASE)
+
+# Rows per unrolled multi-row INSERT statement
+_VALUES_GROUP_ROWS = 500
+
+
+def _ddl_script(statements: Iterable[str]) -> str:
+    """Join DDL statements into one script run as a single transaction."""
+    return "BEGIN;\n" + "\n".join(statements) + "\nCOMMIT;"
+
+
+# Schema DDL run with executescript; views follow the column migrations
+_TABLES_SCRIPT = _ddl_script(SCHEMA_STATEMENTS + [CHECKPOINT_LOOKUP_INDEX])
+# Views are dropped first so databases from older versions get the current definitions
+_VIEWS_SCRIPT = _ddl_script(
+    [
+        "DROP VIEW IF EXISTS %s;" % re.match(r"CREATE VIEW IF NOT EXISTS (\w+)", stmt).group(1)
+        for stmt in VIEW_STATEMENTS
+    ]
+    + VIEW_STATEMENTS
+)
+
+# (table, column, statement) for each ADD COLUMN migration, grouped by table
+_MIGRATIONS = sorted(
+    (
+        (*re.match(r"ALTER TABLE (\w+) ADD COLUMN (\w+)", stmt).groups(), stmt)
+        for stmt in MIGRATION_STATEMENTS
+    ),
+    key=lambda m: m[0],
+)
+
+
+def _run_migrations(conn: sqlite3.Connection) -> None:
+    """Add the columns that tables created by older versions are missing.
+
+    Existing columns are read once per table, and only the missing ALTERs
+    run, together in one transaction.
+    """
+    existing: Dict[str, set] = {}
+    pending = []
+    for table, column, stmt in _MIGRATIONS:
+        if table not in existing:
+            existing[table] = {r[1] for r in conn.execute(f"PRAGMA table_xinfo({table})")}
+        if column not in existing[table]:
+            pending.append(stmt)
+    if pending:
+        conn.executescript(_ddl_script(pending))
+    if "object_name" not in existing["permissions"]:
+        # Columns just added: fill them for the rows of earlier audits
+        conn.execute(PERMISSION_OBJECT_BACKFILL)
+    # created_at is stored as unix seconds; tables from older versions
+    # still default to CURRENT_TIMESTAMP text, so inserts set it explicitly
+    conn.execute(CHECKPOINT_EPOCH_UPGRADE)
+    conn.commit()
+
+
+@lru_cache(maxsize=64)
+def _upsert_site_sql(columns: Tuple[str, ...]) -> str:
+    """Build (once per column set) the save_site upsert returning the row id."""
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns if c != "site_id")
+    action = f"DO UPDATE SET {updates}" if updates else "DO NOTHING"
+    return f"{_insert_sql('sites', columns)} ON CONFLICT(site_id) {action} RETURNING id"
+
+
+@lru_cache(maxsize=256)
+def _values_sql(table_name: str, columns: Tuple[str, ...], rows: int) -> str:
+    """Build (once per shape) an INSERT with ``rows`` VALUES tuples."""
+    row = "(" + ",".join(["?" for _ in columns]) + ")"
+    return f"INSERT INTO {table_name} ({','.join(columns)}) VALUES " + ",".join([row] * rows)
+
+
+@lru_cache(maxsize=64)
+def _values_inserter(
+    table_name: str, columns: Tuple[str, ...]
+) -> Callable[[sqlite3.Connection, List[Mapping[str, Any]]], None]:
+    """Prepare multi-row VALUES inserts of ``columns`` into ``table_name``.
+
+    Returns a function writing one batch of records on a connection as
+    statements of up to ``_VALUES_GROUP_ROWS`` rows (fewer if the variable
+    limit demands), with one shorter statement for the tail. Cached per
+    table and column set.
+    """
+    width = len(columns)
+    group = max(1, min(_VALUES_GROUP_ROWS, _MAX_VARIABLES // width))
+    step = group * width
+    full_group = _values_sql(table_name, columns, group)
+    getter = operator.itemgetter(*columns)
+    flatten = list if width == 1 else lambda v: list(chain.from_iterable(v))
+
+    def write(conn: sqlite3.Connection, batch: List[Mapping[str, Any]]) -> None:
+        try:
+            values = flatten(map(getter, batch))
+        except KeyError:
+            # Records with optional fields: bind the missing ones as NULL
+            values = [r.get(c) for r in batch for c in columns]
+        if len(values) == step:
+            conn.execute(full_group, values)
+            return
+        tail = len(values) - len(values) % step
+        for start in range(0, tail, step):
+            conn.execute(full_group, values[start:start + step])
+        if tail < len(values):
+            conn.execute(_values_sql(table_name, columns, len(batch) - tail // width), values[tail:])
+
+    return write
+
+
+@lru_cache(maxsize=64)
+def _upsert_sql(table_name: str, columns: Tuple[str, ...], unique_columns: Tuple[str, ...]) -> str:
+    """Build (once per shape) the single-row bulk_upsert statement."""
+    placeholders = ",".join(["?" for _ in columns])
+    update_columns = [c for c in columns if c not in unique_columns]
+    if not update_columns:
+        # No columns to update, just ignore duplicates
+        return f"INSERT OR IGNORE INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+    update_clause = ", ".join([f"{c} = excluded.{c}" for c in update_columns])
+    return (
+        f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+        f" ON CONFLICT ({','.join(unique_columns)}) DO UPDATE SET {update_clause}"
+    )
+
+
+def _settle(future: "asyncio.Future[Any]", result: Any, exc: Optional[BaseException]) -> None:
+    if future.cancelled():
+        return
+    if exc is not None:
+        future.set_exception(exc)
+    else:
+        future.set_result(result)
+
+
+def _dumps_checkpoint(data: Any) -> bytes:
+    """Serialize checkpoint data to JSON bytes, via orjson when installed.
+
+    ``bytes`` are taken as JSON the caller already encoded.
+    """
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data)
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data).encode()
+
+
+# Rows written by one bulk_insert before the planner statistics are refreshed
+_OPTIMIZE_AFTER_ROWS = 10000
+
+# Non-unique secondary indexes of a table (autoindexes have no SQL)
+_SECONDARY_INDEXES = (
+    "SELECT name, sql FROM sqlite_master WHERE type = 'index' AND tbl_name = ?"
+    " AND sql IS NOT NULL AND sql NOT LIKE 'CREATE UNIQUE%'"
+)
+
+# Hot-path statements are module constants so each pooled connection's
+# statement cache sees the identical SQL and skips re-parsing it.
+_SELECT_SITE = "SELECT * FROM sites WHERE site_id = ?"
+_INSERT_CHECKPOINT = (
+    "INSERT INTO audit_checkpoints (run_id, checkpoint_type, checkpoint_data, created_at)"
+    " VALUES (?, ?, ?, CAST(strftime('%s', 'now') AS INTEGER))"
+)
+# The materialized summary is a copy of vw_permission_summary taken at the end
+# of an audit; it is current while the marker the refresh left still matches
+# MAX(permissions.id), a single index lookup
+_PERMISSION_SUMMARY_FRESH = (
+    "SELECT EXISTS (SELECT 1 FROM mv_refresh_state"
+    " WHERE id = 1 AND max_permission_id IS (SELECT MAX(id) FROM permissions))"
+)
+# vw_permission_summary's columns, read in rowid ranges from either source
+# table (permissions.id is its rowid) so no cursor is held between chunks
+_PERMISSION_SUMMARY_COLUMNS = (
+    "object_type, object_id, principal_type, principal_id, principal_name,"
+    " permission_level, is_inherited, is_external, is_anonymous_link,"
+    " object_name, object_path"
+)
+_PERMISSION_SUMMARY_CHUNK = {
+    table: (
+        f"SELECT rowid FROM {table} WHERE rowid > ? ORDER BY rowid LIMIT 1 OFFSET ?",
+        f"SELECT {_PERMISSION_SUMMARY_COLUMNS} FROM {table}"
+        " WHERE rowid > ? AND rowid <= ? ORDER BY rowid",
+    )
+    for table in ("mv_permission_summary", "permissions")
+}
+_MAX_ROWID = (1 << 63) - 1
+_SELECT_LATEST_CHECKPOINT = (
+    "SELECT checkpoint_data, created_at FROM audit_checkpoints"
+    " INDEXED BY idx_checkpoints_latest"
+    " WHERE run_id = ? AND checkpoint_type = ? ORDER BY created_at DESC, id DESC LIMIT 1"
+)
+
+
+@lru_cache(maxsize=64)
+def _insert_sql(table_name: str, columns: Tuple[str, ...]) -> str:
+    """Build (once per column set) a single-row INSERT statement."""
+    placeholders = ",".join(["?" for _ in columns])
+    return f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+
+
+@lru_cache(maxsize=1)
+def _iso_at_tick(tick: int) -> str:
+    return datetime.fromtimestamp(tick / 10, timezone.utc).isoformat()
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time as ISO text, formatted at most once per 100 ms."""
+    return _iso_at_tick(int(time.time() * 10))
+
+
+@lru_cache(maxsize=64)
+def _update_audit_run_sql(columns: Tuple[str, ...]) -> str:
+    """Build (once per sorted column set) the update_audit_run statement."""
+    return f"UPDATE audit_runs SET {', '.join(f'{c} = ?' for c in columns)} WHERE run_id = ?"
+
+
+def _rowcount(conn: sqlite3.Connection, sql: str, params: Tuple[Any, ...]) -> int:
+    return conn.execute(sql, params).rowcount
+
+
+def _connect(db_path: Path, pragmas: Iterable[str], readonly: bool = False) -> sqlite3.Connection:
+    # Autocommit mode: transactions are opened explicitly with BEGIN
+    conn = sqlite3.connect(
+        db_path.resolve().as_uri() + "?mode=ro" if readonly else db_path,
+        uri=readonly,
+        check_same_thread=False,
+        cached_statements=512,
+        isolation_level=None,
+    )
+    for pragma in pragmas:
+        conn.execute(pragma)
+    return conn
+
+
+class _ConnectionPool:
+    """Bounded pool of long-lived, read-only sqlite3 connections.
+
+    Connections are opened lazily, up to ``size``, and configured with the
+    per-connection PRAGMAs once when they are opened. A checked-out connection
+    belongs to one caller at a time, so it may move between worker threads.
+    """
+
+    def __init__(self, db_path: Path, size: int = 8, timeout: float = 30.0) -> None:
+        self.db_path = db_path
+        self.size = size
+        self.timeout = timeout
+        self.pragmas: Tuple[str, ...] = CONNECTION_PRAGMAS
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+        self._opened = 0
+        self._lock = threading.Lock()
+        # Bumped by close(); connections opened before it are closed on return
+        self._generation = 0
+        self._conn_generation: Dict[int, int] = {}
+
+    def _open(self) -> sqlite3.Connection:
+        conn = _connect(self.db_path, self.pragmas, readonly=True)
+        with self._lock:
+            self._conn_generation[id(conn)] = self._generation
+        return conn
+
+    def get(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+        if open_new:
+            try:
+                return self._open()
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"No database connection free after {self.timeout}s") from None
+
+    def put(self, conn: sqlite3.Connection) -> None:
+        with self._lock:
+            stale = self._conn_generation.get(id(conn)) != self._generation
+            if stale:
+                self._conn_generation.pop(id(conn), None)
+                self._opened -= 1
+        if stale:
+            conn.close()
+            return
+        if conn.in_transaction:
+            conn.rollback()
+        self._idle.put(conn)
+
+    @contextmanager
+    def connection(self) -> Iterator[sqlite3.Connection]:
+        conn = self.get()
+        try:
+            yield conn
+        finally:
+            self.put(conn)
+
+    def close(self) -> None:
+        """Close the idle connections; checked-out ones close when returned."""
+        with self._lock:
+            self._generation += 1
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    break
+                self._conn_generation.pop(id(conn), None)
+                conn.close()
+                self._opened -= 1
+
 
 class DatabaseRepository:
-    """Async SQLite database repository implemented with sqlite3."""
+    """Async SQLite database repository implemented with sqlite3.
 
-    def __init__(self, db_path: str | Path) -> None:
-        self.db_path = Path(db_path)
+    Writes go through one dedicated writer connection, owned by a writer
+    thread and serialized by an ``asyncio.Lock``; reads use the connection
+    pool, which WAL lets run alongside the writer.
+    """
 
-    async def initialize_database(self) -> None:
+    def __init__(self, db_path: str | Path, pool_size: int = 8) -> None:
+        self.db_path = Path(db_path)
+        self._pool = _ConnectionPool(self.db_path, size=pool_size)
+        self._writer_conn: Optional[sqlite3.Connection] = None
+        self._writer_lock = asyncio.Lock()
+        self._writer_queue: "queue.SimpleQueue" = queue.SimpleQueue()
+        self._writer_thread: Optional[threading.Thread] = None
+        self._writer_thread_lock = threading.Lock()
+        # Group commit for save_checkpoint: one flusher per event loop
+        self._ckpt_queue: Optional[asyncio.Queue] = None
+        self._ckpt_flusher_task: Optional[asyncio.Task] = None
+        self.checkpoint_batch_size = 256
+        self.checkpoint_flush_interval = 0.005
+        # Schema lookups, cached until this repository runs DDL
+        self._table_names: Optional[set] = None
+        self._table_columns: Dict[str, List[str]] = {}
+
+    def configure_readonly(self, mmap_size: int = 256 * 1024 * 1024) -> None:
+        """Tune connections for a read-heavy consumer such as the dashboard.
+
+        Memory-maps up to ``mmap_size`` bytes (capped at the file size), uses a
+        64 MB page cache and keeps temp b-trees in memory. Pooled connections
+        are closed (checked-out ones on return) so later checkouts pick up
+        the settings.
+        """
+        file_size = self.db_path.stat().st_size if self.db_path.exists() else 0
+        self._pool.pragmas = CONNECTION_PRAGMAS + (
+            f"PRAGMA mmap_size={min(mmap_size, file_size)}",
+            "PRAGMA cache_size=-65536",
+            "PRAGMA temp_store=MEMORY",
+        )
+        self._pool.close()
+
+    def close(self) -> None:
+        """Stop the writer thread and close the writer and pooled connections."""
+        if self._writer_thread is not None:
+            self._writer_queue.put(None)
+            self._writer_thread.join()
+            self._writer_thread = None
+        if self._writer_conn is not None:
+            self._writer_conn.execute("PRAGMA optimize")
+            self._writer_conn.close()
+            self._writer_conn = None
+        self._pool.close()
+
+    async def initialize_database(self, defer_indexes: bool = False) -> None:
+        """Create the schema.
+
+        With ``defer_indexes`` only tables and views are created, so an initial
+        bulk load does not maintain every secondary index row by row; call
+        :meth:`finalize_indexes` once the load is done.
+        """
         optimizer = DatabaseOptimizer(str(self.db_path))
         await optimizer.initialize_database()
-        await asyncio.to_thread(self._create_schema)
+        await asyncio.to_thread(self._create_tables)
+        self._clear_schema_cache()
+        if not defer_indexes:
+            await asyncio.to_thread(self._create_indexes, INDEX_STATEMENTS)
+
+    async def finalize_indexes(self) -> None:
+        """Build the schema and dashboard indexes, then refresh statistics."""
+        async with self._writer_lock:
+            await self._on_writer(self._create_indexes, INDEX_STATEMENTS + PERFORMANCE_INDEXES)
 
-    def _create_schema(self) -> None:
+    def _create_tables(self) -> None:
         with sqlite3.connect(self.db_path) as conn:
-            for stmt in SCHEMA_STATEMENTS:
-                conn.execute(stmt)
-            for stmt in INDEX_STATEMENTS:
-                conn.execute(stmt)
-            for stmt in VIEW_STATEMENTS:
-                conn.execute(stmt)
-            conn.commit()
+            conn.executescript(_TABLES_SCRIPT)
+            _run_migrations(conn)
+            conn.executescript(_VIEWS_SCRIPT)
 
-    @asynccontextmanager
-    async def transaction(self) -> Iterable[sqlite3.Connection]:
-        conn = sqlite3.connect(self.db_path)
+    def _create_indexes(self, statements: List[str]) -> None:
+        with sqlite3.connect(self.db_path) as conn:
+            conn.executescript(_ddl_script(statements))
+            # Give the planner table statistics; the limit bounds the cost on large files
+            conn.execute("PRAGMA analysis_limit=1000")
+            conn.execute("ANALYZE")
+
+    def _on_writer(self, fn: Callable[..., Any], *args: Any) -> "asyncio.Future[Any]":
+        """Run ``fn(*args)`` on the writer thread; await the returned future."""
+        if self._writer_thread is None:
+            with self._writer_thread_lock:
+                if self._writer_thread is None:
+                    self._writer_thread = threading.Thread(
+                        target=self._writer_loop, name="sqlite-writer", daemon=True
+                    )
+                    self._writer_thread.start()
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._writer_queue.put((loop, future, fn, args))
+        return future
+
+    def _writer_loop(self) -> None:
+        while (item := self._writer_queue.get()) is not None:
+            loop, future, fn, args = item
+            try:
+                result, exc = fn(*args), None
+            except BaseException as e:
+                result, exc = None, e
+            try:
+                loop.call_soon_threadsafe(_settle, future, result, exc)
+            except RuntimeError:
+                pass  # the caller's loop has already closed
+
+    def _writer(self) -> sqlite3.Connection:
+        if self._writer_conn is None:
+            self._writer_conn = _connect(
+                self.db_path,
+                ("PRAGMA journal_mode=WAL", "PRAGMA analysis_limit=1000") + CONNECTION_PRAGMAS,
+            )
+        return self._writer_conn
+
+    def _execute_on_writer(self, sql: str) -> None:
+        self._writer().execute(sql)
+
+    def _begin(self) -> sqlite3.Connection:
+        conn = self._writer()
+        if conn.in_transaction:
+            # Left open by a caller cancelled between BEGIN and its body
+            conn.rollback()
+        # Take the write lock up front rather than upgrading mid-transaction
+        conn.execute("BEGIN IMMEDIATE")
+        return conn
+
+    async def begin_bulk_phase(self) -> None:
+        """Stop syncing writer commits to disk until :meth:`end_bulk_phase`.
+
+        An interrupted ingest is re-run rather than recovered, so commits
+        made during it do not need to survive a power loss. Readers are
+        unaffected: the journal stays in WAL mode and locking stays normal.
+        """
+        async with self._writer_lock:
+            await self._on_writer(self._execute_on_writer, "PRAGMA synchronous=OFF")
+
+    async def end_bulk_phase(self) -> None:
+        """Return the writer to ``synchronous=NORMAL`` and checkpoint the WAL."""
+        async with self._writer_lock:
+            await self._on_writer(self._execute_on_writer, "PRAGMA synchronous=NORMAL")
+            await self._on_writer(self._execute_on_writer, "PRAGMA wal_checkpoint(PASSIVE)")
+
+    def _run_transaction(self, fn: Callable[..., Any], *args: Any) -> Any:
+        conn = self._begin()
         try:
-            conn.execute("BEGIN")
-            yield conn
+            result = fn(conn, *args)
             conn.commit()
-        except Exception:
+        except BaseException:
             conn.rollback()
             raise
-        finally:
-            conn.close()
+        return result
+
+    async def _write(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """Run ``fn(conn, *args)`` in one transaction on the writer thread.
+
+        BEGIN, the body, and the commit or rollback run in one hop, so the
+        event loop never touches the writer connection.
+        """
+        async with self._writer_lock:
+            return await self._on_writer(self._run_transaction, fn, *args)
+
+    @asynccontextmanager
+    async def transaction(self) -> Iterable[sqlite3.Connection]:
+        """Yield the writer connection inside a transaction.
+
+        The body runs on the caller's thread; prefer :meth:`_write` for work
+        that should stay off the event loop.
+        """
+        async with self._writer_lock:
+            conn = await self._on_writer(self._begin)
+            try:
+                yield conn
+                await self._on_writer(conn.commit)
+            except BaseException:
+                # Queued behind any commit still running on the writer thread
+                await self._on_writer(conn.rollback)
+                raise
 
     async def bulk_insert(
-        self, table_name: str, records: Iterable[Mapping[str, Any]], batch_size: int = 1000
+        self,
+        table_name: str,
+        records: Iterable[Mapping[str, Any]] | AsyncIterator[Mapping[str, Any]],
+        batch_size: int = 1000,
+        defer_indexes: bool = False,
     ) -> int:
-        records = list(records)
-        if not records:
+        """Insert records in one transaction, pulling them ``batch_size`` at a time.
+
+        Any iterable is consumed lazily, on the writer thread; async iterators
+        are handed to :meth:`bulk_insert_stream`. For large cold loads, ``defer_indexes``
+        drops the table's non-unique indexes for the load and rebuilds them
+        (and its statistics) afterwards, inside the same transaction.
+        """
+        if hasattr(records, "__aiter__"):
+            return await self.bulk_insert_stream(table_name, records, batch_size)
+        rows = iter(records)
+        first = next(rows, None)
+        if first is None:
             return 0
-        columns = list(records[0].keys())
-        placeholders = ",".join(["?" for _ in columns])
-        query = f"INSERT INTO {table_name} ({','.join(columns)}) VALUES ({placeholders})"
+        batch_size = max(1, batch_size)
+        write = _values_inserter(table_name, tuple(first.keys()))
+        rows = chain((first,), rows)
+
+        def load(conn: sqlite3.Connection) -> int:
+            total = 0
+            if defer_indexes:
+                indexes = conn.execute(_SECONDARY_INDEXES, (table_name,)).fetchall()
+                for name, _ in indexes:
+                    conn.execute(f"DROP INDEX {name}")
+            while batch := list(islice(rows, batch_size)):
+                write(conn, batch)
+                total += len(batch)
+            if defer_indexes:
+                for _, sql in indexes:
+                    conn.execute(sql)
+                conn.execute(f"ANALYZE {table_name}")
+            return total
+
+        total = await self._write(load)
+        if not defer_indexes:
+            await self._analyze_if_grown(table_name, total)
+        return total
+
+    async def bulk_insert_stream(
+        self,
+        table_name: str,
+        records: AsyncIterator[Mapping[str, Any]],
+        batch_size: int = 1000,
+    ) -> int:
+        """Insert records from an async producer as they arrive.
+
+        Each batch commits on its own, so the writer is not held while the
+        producer awaits its next page and memory stays at one batch.
+        """
+        batch_size = max(1, batch_size)
+        write = None
+        batch: List[Mapping[str, Any]] = []
         total = 0
-        async with self.transaction() as conn:
-            for i in range(0, len(records), batch_size):
-                batch = records[i : i + batch_size]
-                values = [tuple(r.get(c) for c in columns) for r in batch]
-                conn.executemany(query, values)
+        async for record in records:
+            if write is None:
+                write = _values_inserter(table_name, tuple(record.keys()))
+            batch.append(record)
+            if len(batch) == batch_size:
+                await self._write(write, batch)
                 total += len(batch)
+                batch = []
+        if batch:
+            await self._write(write, batch)
+            total += len(batch)
+        await self._analyze_if_grown(table_name, total)
         return total
 
+    async def _analyze_if_grown(self, table_name: str, inserted: int) -> None:
+        if inserted >= _OPTIMIZE_AFTER_ROWS:
+            # PRAGMA optimize only revisits tables this connection has queried,
+            # so re-analyze the table that just grew directly.
+            async with self._writer_lock:
+                await self._on_writer(self._execute_on_writer, f"ANALYZE {table_name}")
+
     async def bulk_upsert(
         self, table_name: str, records: Iterable[Mapping[str, Any]],
         unique_columns: List[str], batch_size: int = 1000
     ) -> int:
         """Insert or update records based on unique columns."""
-        records = list(records)
-        if not records:
+        rows = iter(records)
+        first = next(rows, None)
+        if first is None:
             return 0
 
-        columns = list(records[0].keys())
-        placeholders = ",".join(["?" for _ in columns])
-
-        # Build the update clause for ON CONFLICT
-        update_columns = [c for c in columns if c not in unique_columns]
-
-        if update_columns:
-            # Update non-unique columns on conflict
-            update_clause = ", ".join([f"{c} = excluded.{c}" for c in update_columns])
-            query = f"""
-                INSERT INTO {table_name} ({','.join(columns)})
-                VALUES ({placeholders})
-                ON CONFLICT ({','.join(unique_columns)})
-                DO UPDATE SET {update_clause}
-            """
-        else:
-            # No columns to update, just ignore duplicates
-            query = f"""
-                INSERT OR IGNORE INTO {table_name} ({','.join(columns)})
-                VALUES ({placeholders})
-            """
-
-        total = 0
-        async with self.transaction() as conn:
-            for i in range(0, len(records), batch_size):
-                batch = records[i : i + batch_size]
-                values = [tuple(r.get(c) for c in columns) for r in batch]
+        columns = tuple(first.keys())
+        query = _upsert_sql(table_name, columns, tuple(unique_columns))
+        getter = operator.itemgetter(*columns)
+        if len(columns) == 1:
+            getter = lambda r, g=getter: (g(r),)
+        rows = chain((first,), rows)
+
+        def upsert(conn: sqlite3.Connection) -> int:
+            total = 0
+            while batch := list(islice(rows, batch_size)):
+                try:
+                    values = list(map(getter, batch))
+                except KeyError:
+                    # Records with optional fields: bind the missing ones as NULL
+                    values = [tuple(r.get(c) for c in columns) for r in batch]
                 conn.executemany(query, values)
                 total += len(batch)
-        return total
+            return total
 
-    async def save_site(self, site_data: Mapping[str, Any], conn: Optional[sqlite3.Connection] = None) -> None:
-        columns = list(site_data.keys())
-        placeholders = ",".join(["?" for _ in columns])
-        query = f"INSERT INTO sites ({','.join(columns)}) VALUES ({placeholders})"
-        values = tuple(site_data.get(c) for c in columns)
+        return await self._write(upsert)
+
+    async def save_site(
+        self, site_data: Mapping[str, Any], conn: Optional[sqlite3.Connection] = None
+    ) -> Optional[int]:
+        """Insert or update a site by ``site_id`` and return its row id."""
+        columns = tuple(sorted(site_data.keys()))
+        query = _upsert_site_sql(columns)
+        values = tuple(site_data[c] for c in columns)
         if conn is None:
-            async with self.transaction() as conn2:
-                conn2.execute(query, values)
+            rows = await self._write(lambda c: c.execute(query, values).fetchall())
         else:
-            conn.execute(query, values)
+            rows = conn.execute(query, values).fetchall()
+        return rows[0][0] if rows else None
 
     async def get_site(self, site_id: str) -> Optional[Mapping[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT * FROM sites WHERE site_id = ?", (site_id,))
-            row = cursor.fetchone()
-            if row is None:
-                return None
-            return {description[0]: value for description, value in zip(cursor.description, row)}
+        def _fetch():
+            with self._pool.connection() as conn:
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                row = cursor.execute(_SELECT_SITE, (site_id,)).fetchone()
+                return dict(row) if row is not None else None
+
+        return await asyncio.to_thread(_fetch)
+
+    async def iter_permission_summary(self, chunk_size: int = 1000) -> AsyncIterator[sqlite3.Row]:
+        """Yield permission summary rows, fetching ``chunk_size`` at a time.
+
+        Rows come from mv_permission_summary, or from the live
+        vw_permission_summary while no refresh covers the current permissions
+        (older databases, failed runs, audits in progress). Rows are ``sqlite3.Row``
+        objects, readable by index or column name without copying each one
+        into a dict. Each chunk checks out a pooled connection in a worker
+        thread and returns it before the rows are yielded.
+        """
+        def _fresh() -> bool:
+            with self._pool.connection() as conn:
+                return bool(conn.execute(_PERMISSION_SUMMARY_FRESH).fetchone()[0])
+
+        table = "mv_permission_summary" if await asyncio.to_thread(_fresh) else "permissions"
+        select_end, select_rows = _PERMISSION_SUMMARY_CHUNK[table]
+
+        def _chunk(after: int) -> Tuple[List[sqlite3.Row], int]:
+            with self._pool.connection() as conn:
+                end = conn.execute(select_end, (after, chunk_size - 1)).fetchone()
+                end = end[0] if end is not None else _MAX_ROWID
+                cursor = conn.cursor()
+                cursor.row_factory = sqlite3.Row
+                return cursor.execute(select_rows, (after, end)).fetchall(), end
+
+        after = 0
+        while after < _MAX_ROWID:
+            rows, after = await asyncio.to_thread(_chunk, after)
+            for r in rows:
+                yield r
 
     async def get_permission_summary(self) -> list[Mapping[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("SELECT * FROM vw_permission_summary")
-            rows = cursor.fetchall()
-            columns = [d[0] for d in cursor.description]
-            return [dict(zip(columns, r)) for r in rows]
+        """Materialized dict form of :meth:`iter_permission_summary`."""
+        rows = [r async for r in self.iter_permission_summary()]
+        if not rows:
+            return []
+        # zip over the shared keys beats dict(row), which looks up each name
+        columns = rows[0].keys()
+        return [dict(zip(columns, r)) for r in rows]
 
     async def save_checkpoint(
         self,
@@ -139,61 +737,255 @@ class DatabaseRepository:
         checkpoint_type: str,
         checkpoint_data: Any,
     ) -> None:
-        data = json.dumps(checkpoint_data)
-        query = (
-            "INSERT INTO audit_checkpoints (run_id, checkpoint_type, checkpoint_data)"
-            " VALUES (?, ?, ?)"
-        )
-        async with self.transaction() as conn:
-            conn.execute(query, (run_id, checkpoint_type, data))
+        """Queue a checkpoint row and wait until its group commit lands.
+
+        Concurrent callers are batched into one transaction of up to
+        ``checkpoint_batch_size`` rows or whatever arrives within
+        ``checkpoint_flush_interval`` seconds. ``checkpoint_data`` given as
+        ``bytes`` is taken as already-encoded JSON.
+        """
+        # zlib-compressed JSON; get_latest_checkpoint hands back the JSON text
+        data = zlib.compress(_dumps_checkpoint(checkpoint_data), 3)
+        future = asyncio.get_running_loop().create_future()
+        await self._checkpoint_queue().put(((run_id, checkpoint_type, data), future))
+        await future
+
+    async def save_checkpoints_bulk(self, checkpoints: Iterable[Tuple[str, str, Any]]) -> int:
+        """Write many ``(run_id, checkpoint_type, data)`` checkpoints in one transaction.
+
+        As with :meth:`save_checkpoint`, ``data`` given as ``bytes`` is stored
+        as already-encoded JSON. Encoding, BEGIN IMMEDIATE, the insert and the
+        commit all run in one hop to the writer thread, so a batch costs one
+        WAL sync and keeps compression off the event loop.
+        """
+        checkpoints = list(checkpoints)
+        if not checkpoints:
+            return 0
+        async with self._writer_lock:
+            return await self._on_writer(self._insert_checkpoints, checkpoints)
+
+    def _insert_checkpoints(self, checkpoints: List[Tuple[str, str, Any]]) -> int:
+        rows = [
+            (run_id, checkpoint_type, zlib.compress(_dumps_checkpoint(data), 3))
+            for run_id, checkpoint_type, data in checkpoints
+        ]
+        self._run_transaction(sqlite3.Connection.executemany, _INSERT_CHECKPOINT, rows)
+        return len(rows)
+
+    def _checkpoint_queue(self) -> asyncio.Queue:
+        task = self._ckpt_flusher_task
+        if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+            self._ckpt_queue = asyncio.Queue()
+            self._ckpt_flusher_task = asyncio.create_task(
+                self._flush_checkpoints(self._ckpt_queue)
+            )
+        return self._ckpt_queue
+
+    async def _flush_checkpoints(self, pending: asyncio.Queue) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await pending.get()]
+            deadline = loop.time() + self.checkpoint_flush_interval
+            while len(batch) < self.checkpoint_batch_size:
+                try:
+                    batch.append(pending.get_nowait())
+                    continue
+                except asyncio.QueueEmpty:
+                    pass
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(pending.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._write(
+                    sqlite3.Connection.executemany, _INSERT_CHECKPOINT, [row for row, _ in batch]
+                )
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+            else:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_result(None)
 
     async def get_latest_checkpoint(
         self, run_id: str, checkpoint_type: str
     ) -> Optional[Mapping[str, Any]]:
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute(
-                "SELECT checkpoint_data, created_at FROM audit_checkpoints "
-                "WHERE run_id = ? AND checkpoint_type = ? ORDER BY created_at DESC LIMIT 1",
-                (run_id, checkpoint_type),
-            )
-            row = cursor.fetchone()
-            if row is None:
-                return None
-            return {"checkpoint_data": row[0], "created_at": row[1]}
+        def _fetch():
+            with self._pool.connection() as conn:
+                return conn.execute(
+                    _SELECT_LATEST_CHECKPOINT, (run_id, checkpoint_type)
+                ).fetchone()
+
+        row = await asyncio.to_thread(_fetch)
+        if row is None:
+            return None
+        data = row[0]
+        if isinstance(data, bytes):
+            data = zlib.decompress(data).decode()
+        return {"checkpoint_data": data, "created_at": row[1]}
 
     async def delete_checkpoints_before(self, cutoff_date: datetime) -> None:
-        async with self.transaction() as conn:
-            conn.execute(
-                "DELETE FROM audit_checkpoints WHERE created_at < ?",
-                (cutoff_date.isoformat(),),
-            )
+        await self._write(
+            sqlite3.Connection.execute,
+            "DELETE FROM audit_checkpoints WHERE created_at < ?",
+            (int(cutoff_date.timestamp()),),
+        )
 
     async def fetch_all(self, query: str, params: Optional[tuple] = None) -> List[Dict[str, Any]]:
         """Execute a SELECT query and return all results as a list of dictionaries."""
+        columns, rows = await self.fetch_all_columnar(query, params)
+        return [dict(zip(columns, row)) for row in rows]
+
+    async def fetch_all_columnar(
+        self, query: str, params: Optional[tuple] = None
+    ) -> Tuple[List[str], List[tuple]]:
+        """Execute a SELECT query and return its column names and plain row tuples.
+
+        For callers that walk rows positionally and do not need a dict per row.
+        """
         def _fetch():
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._pool.connection() as conn:
                 cursor = conn.execute(query, params or ())
-                rows = cursor.fetchall()
-                return [dict(row) for row in rows]
+                columns = [d[0] for d in cursor.description]
+                return columns, cursor.fetchall()
 
         return await asyncio.to_thread(_fetch)
 
+    async def fetch_columnar(
+        self, query: str, params: Optional[tuple] = None
+    ) -> Dict[str, List[Any]]:
+        """Execute a SELECT query and return one list of values per column.
+
+        Builds a list per column rather than a dict per row, for reporting
+        code that aggregates or hands columns to pandas; use
+        :meth:`fetch_typed` for numpy arrays.
+        """
+        columns, rows = await self.fetch_all_columnar(query, params)
+        if not rows:
+            return {column: [] for column in columns}
+        return {column: list(values) for column, values in zip(columns, zip(*rows))}
+
+    async def fetch_typed(
+        self,
+        query: str,
+        dtypes: Mapping[str, str],
+        params: Optional[tuple] = None,
+        chunk_size: int = 10_000,
+    ) -> Dict[str, "np.ndarray"]:
+        """Execute a SELECT query and return one numpy array per column.
+
+        Columns named in ``dtypes`` are converted batch by batch as rows are
+        fetched, with NULL read as NaN in float columns and 0 in integer and
+        bool ones. Other columns are kept as object arrays.
+        """
+        if np is None:
+            raise RuntimeError("numpy is required for fetch_typed")
+
+        def _fetch():
+            with self._pool.connection() as conn:
+                cursor = conn.execute(query, params or ())
+                names = [d[0] for d in cursor.description]
+                kinds = [np.dtype(dtypes.get(name, object)) for name in names]
+                nulls = [np.nan if kind.kind == "f" else 0 for kind in kinds]
+                chunks: List[List["np.ndarray"]] = [[] for _ in names]
+                while True:
+                    rows = cursor.fetchmany(chunk_size)
+                    if not rows:
+                        break
+                    for column, values, kind, null in zip(chunks, zip(*rows), kinds, nulls):
+                        if kind != object:
+                            values = [null if v is None else v for v in values]
+                        column.append(np.array(values, dtype=kind))
+                return {
+                    name: np.concatenate(column) if column else np.empty(0, dtype=kind)
+                    for name, column, kind in zip(names, chunks, kinds)
+                }
+
+        return await asyncio.to_thread(_fetch)
+
+    def fetch_dataframe(
+        self,
+        query: str,
+        params: Optional[tuple] = None,
+        dtype: Optional[Mapping[str, str]] = None,
+    ) -> "pd.DataFrame":
+        """Execute a SELECT query and return the results as a pandas DataFrame.
+
+        Synchronous, for the dashboard's cached loaders. pandas reads the
+        sqlite3 cursor directly, so no per-row dicts or SQLAlchemy engine are
+        built. pandas is imported here to keep it off the CLI's import path.
+        """
+        import pandas as pd
+
+        with self._pool.connection() as conn:
+            return pd.read_sql_query(query, conn, params=params, dtype=dtype)
+
+    async def stream_arrow(
+        self, query: str, params: Optional[tuple] = None, chunk_size: int = 8192
+    ) -> AsyncIterator["pa.RecordBatch"]:
+        """Execute a SELECT query and yield the results as pyarrow RecordBatches.
+
+        Rows are pulled with fetchmany, so at most ``chunk_size`` Python row
+        tuples are alive at a time.
+        """
+        if pa is None:
+            raise RuntimeError("pyarrow is required for stream_arrow")
+
+        conn = await asyncio.to_thread(self._pool.get)
+        cursor = conn.cursor()
+        try:
+            await asyncio.to_thread(cursor.execute, query, params or ())
+            names = [d[0] for d in cursor.description]
+            while True:
+                rows = await asyncio.to_thread(cursor.fetchmany, chunk_size)
+                if not rows:
+                    break
+                yield pa.RecordBatch.from_arrays(
+                    [pa.array(column) for column in zip(*rows)], names=names
+                )
+        finally:
+            # Finish the statement before the connection goes back to the pool
+            cursor.close()
+            self._pool.put(conn)
+
+    async def fetch_arrow(self, query: str, params: Optional[tuple] = None) -> "pa.Table":
+        """Execute a SELECT query and return the results as a columnar pyarrow Table."""
+        tables = [
+            pa.Table.from_batches([batch])
+            async for batch in self.stream_arrow(query, params)
+        ]
+        if not tables:
+            return pa.table({})
+        # Batches infer their types independently (e.g. an all-NULL chunk),
+        # so let concat_tables unify the schemas
+        return pa.concat_tables(tables, promote_options="default")
+
     async def fetch_one(self, query: str, params: Optional[tuple] = None) -> Optional[Dict[str, Any]]:
         """Execute a SELECT query and return the first result as a dictionary."""
         def _fetch():
-            with sqlite3.connect(self.db_path) as conn:
-                conn.row_factory = sqlite3.Row
+            with self._pool.connection() as conn:
                 cursor = conn.execute(query, params or ())
                 row = cursor.fetchone()
-                return dict(row) if row else None
+                if row is None:
+                    return None
+                return dict(zip([d[0] for d in cursor.description], row))
 
         return await asyncio.to_thread(_fetch)
 
     async def execute(self, query: str, params: Optional[tuple] = None) -> None:
         """Execute a non-SELECT query."""
-        async with self.transaction() as conn:
-            conn.execute(query, params or ())
+        await self._write(sqlite3.Connection.execute, query, params or ())
+        if _DDL.match(query):
+            self._clear_schema_cache()
+
+    def _clear_schema_cache(self) -> None:
+        self._table_names = None
+        self._table_columns.clear()
 
     async def count_rows(self, table_name: str, where_clause: Optional[str] = None) -> int:
         """Count rows in a table with optional WHERE clause."""
@@ -206,31 +998,37 @@ class DatabaseRepository:
 
     async def table_exists(self, table_name: str) -> bool:
         """Check if a table exists in the database."""
-        query = "SELECT name FROM sqlite_master WHERE type='table' AND name=?"
-        result = await self.fetch_one(query, (table_name,))
-        return result is not None
+        if self._table_names is None:
+            rows = await self.fetch_all("SELECT name FROM sqlite_master WHERE type='table'")
+            self._table_names = {row["name"] for row in rows}
+        return table_name in self._table_names
 
     async def get_table_columns(self, table_name: str) -> List[str]:
         """Get column names for a table."""
-        query = f"PRAGMA table_info({table_name})"
+        columns = self._table_columns.get(table_name)
+        if columns is None:
+            query = f"PRAGMA table_info({table_name})"
 
-        def _get_columns():
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.execute(query)
-                return [row[1] for row in cursor.fetchall()]
+            def _get_columns():
+                with self._pool.connection() as conn:
+                    cursor = conn.execute(query)
+                    return [row[1] for row in cursor.fetchall()]
 
-        return await asyncio.to_thread(_get_columns)
+            columns = await asyncio.to_thread(_get_columns)
+            if columns:
+                # Unknown tables are not cached, so they show up once created
+                self._table_columns[table_name] = columns
+        return list(columns)
 
     async def update_audit_run(self, run_id: str, updates: Dict[str, Any]) -> None:
         """Update an audit run record."""
         if not updates:
             return
 
-        set_clauses = [f"{key} = ?" for key in updates.keys()]
-        query = f"UPDATE audit_runs SET {', '.join(set_clauses)} WHERE run_id = ?"
-        params = list(updates.values()) + [run_id]
-
-        await self.execute(query, tuple(params))
+        # Sorted so one statement serves every ordering of the same columns
+        columns = tuple(sorted(updates))
+        params = tuple(updates[c] for c in columns) + (run_id,)
+        await self.execute(_update_audit_run_sql(columns), params)
 
     async def create_audit_run(self, run_id: str, tenant_id: Optional[int] = None) -> None:
         """Create a new audit run record."""
@@ -239,64 +1037,73 @@ class DatabaseRepository:
 
     async def get_sites_summary(self) -> Dict[str, Any]:
         """Get a summary of sites in the database."""
-        # Get counts separately to avoid JOIN issues
-        total_sites = await self.count_rows("sites")
-        total_libraries = await self.count_rows("libraries")
-        total_files = await self.count_rows("files")
-
-        # Get total size
-        size_query = "SELECT SUM(size_bytes) as total_size_bytes FROM files"
-        size_result = await self.fetch_one(size_query)
-        total_size_bytes = size_result['total_size_bytes'] if size_result and size_result['total_size_bytes'] else 0
-
-        return {
-            "total_sites": total_sites,
-            "total_libraries": total_libraries,
-            "total_files": total_files,
-            "total_size_bytes": total_size_bytes,
-        }
+        # Independent scalar subqueries avoid the fan-out of joining these tables
+        query = """
+        SELECT
+            (SELECT COUNT(*) FROM sites) AS total_sites,
+            (SELECT COUNT(*) FROM libraries) AS total_libraries,
+            (SELECT COUNT(*) FROM files) AS total_files,
+            (SELECT COALESCE(SUM(size_bytes), 0) FROM files) AS total_size_bytes
+        """
+        return await self.fetch_one(query)
 
     async def get_permissions_summary(self) -> Dict[str, Any]:
         """Get a summary of permissions in the database."""
-        total_permissions = await self.count_rows("permissions")
-        unique_permissions = await self.count_rows("permissions", "is_inherited = 0")
-
+        # One row: both totals plus the per-level counts as a JSON object
         query = """
-        SELECT permission_level, COUNT(*) as count
-        FROM permissions
-        GROUP BY permission_level
+        SELECT
+            COALESCE(SUM(count), 0) AS total_permissions,
+            COALESCE(SUM(unique_count), 0) AS unique_permissions,
+            json_group_object(permission_level, count) AS permissions_by_level
+        FROM (
+            SELECT permission_level, COUNT(*) AS count, SUM(is_inherited = 0) AS unique_count
+            FROM permissions
+            GROUP BY permission_level
+        )
         """
 
-        levels = await self.fetch_all(query)
+        summary = await self.fetch_one(query)
+        summary["permissions_by_level"] = json.loads(summary["permissions_by_level"])
+        return summary
 
-        return {
-            "total_permissions": total_permissions,
-            "unique_permissions": unique_permissions,
-            "permissions_by_level": {row['permission_level']: row['count'] for row in levels}
-        }
+    async def refresh_materialized_views(self, run_id: Optional[str] = None) -> None:
+        """Rebuild every materialized summary table in one transaction."""
+        def refresh(conn: sqlite3.Connection) -> None:
+            conn.execute("DELETE FROM mv_permission_summary")
+            conn.execute(MV_PERMISSION_SUMMARY_REFRESH)
+            conn.execute(MV_REFRESH_STATE_UPDATE, (run_id,))
+            conn.execute("DELETE FROM permission_summary")
+            conn.execute(PERMISSION_SUMMARY_REFRESH, (run_id,))
+            conn.execute("DELETE FROM storage_analytics")
+            conn.execute(STORAGE_ANALYTICS_REFRESH, (run_id,))
+
+        await self._write(refresh)
 
     async def vacuum(self) -> None:
         """Run VACUUM to optimize database file size."""
-        def _vacuum():
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("VACUUM")
-
-        await asyncio.to_thread(_vacuum)
+        async with self._writer_lock:
+            await self._on_writer(self._execute_on_writer, "VACUUM")
 
     async def analyze(self) -> None:
-        """Run ANALYZE to update database statistics."""
-        def _analyze():
-            with sqlite3.connect(self.db_path) as conn:
-                conn.execute("ANALYZE")
+        """Refresh statistics with PRAGMA optimize, which only re-analyzes where SQLite sees a need."""
+        async with self._writer_lock:
+            await self._on_writer(self._execute_on_writer, "PRAGMA optimize")
 
-        await asyncio.to_thread(_analyze)
+    async def full_analyze(self) -> None:
+        """Run a full ANALYZE of every table and index."""
+        async with self._writer_lock:
+            await self._on_writer(self._execute_on_writer, "ANALYZE")
 
-    async def check_integrity(self) -> bool:
-        """Check database integrity."""
-        query = "PRAGMA integrity_check"
+    async def check_integrity(self, fast: bool = True) -> bool:
+        """Check database integrity.
+
+        ``fast`` runs PRAGMA quick_check, which skips the index-to-table
+        cross-checks of a full PRAGMA integrity_check.
+        """
+        query = "PRAGMA quick_check" if fast else "PRAGMA integrity_check"
 
         def _check():
-            with sqlite3.connect(self.db_path) as conn:
+            with self._pool.connection() as conn:
                 cursor = conn.execute(query)
                 result = cursor.fetchone()
                 return result[0] == "ok" if result else False
@@ -310,22 +1117,27 @@ class DatabaseRepository:
 
     async def set_cache_entry(self, key: str, value: str, expires_at: Optional[datetime] = None) -> None:
         """Set or update a cache entry."""
-        query = """
-        INSERT INTO cache_entries (cache_key, cache_value, expires_at)
-        VALUES (?, ?, ?)
-        ON CONFLICT(cache_key) DO UPDATE SET
-            cache_value = excluded.cache_value,
-            expires_at = excluded.expires_at
-        """
-        expires_at_str = expires_at.isoformat() if expires_at else datetime.now(timezone.utc).isoformat()
-        await self.execute(query, (key, value, expires_at_str))
+        await self.set_cache_entries([(key, value, expires_at)])
+
+    async def set_cache_entries(
+        self, items: Iterable[Tuple[str, str, Optional[datetime]]]
+    ) -> int:
+        """Set or update many ``(key, value, expires_at)`` cache entries in one transaction."""
+        # Streamed into bulk_upsert rather than collected first
+        records = (
+            {
+                "cache_key": key,
+                "cache_value": value,
+                "expires_at": expires_at.isoformat() if expires_at else _utc_now_iso(),
+            }
+            for key, value, expires_at in items
+        )
+        return await self.bulk_upsert("cache_entries", records, unique_columns=["cache_key"])
 
     async def delete_cache_entry(self, key: str) -> bool:
         """Delete a cache entry."""
         query = "DELETE FROM cache_entries WHERE cache_key = ?"
-        async with self.transaction() as conn:
-            cursor = conn.execute(query, (key,))
-            return cursor.rowcount > 0
+        return await self._write(_rowcount, query, (key,)) > 0
 
     async def clear_cache(self) -> None:
         """Clear all cache entries."""
@@ -334,20 +1146,49 @@ class DatabaseRepository:
     async def cleanup_expired_cache_entries(self) -> int:
         """Delete expired cache entries and return count of deleted entries."""
         query = "DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at < ?"
-        async with self.transaction() as conn:
-            cursor = conn.execute(query, (datetime.now(timezone.utc).isoformat(),))
-            return cursor.rowcount
+        now = _utc_now_iso()
+        return await self._write(_rowcount, query, (now,))
+
+    async def _has_index(self, name: str) -> bool:
+        """Check whether an index exists, e.g. before an INDEXED BY hint."""
+        row = await self.fetch_one(
+            "SELECT 1 AS present FROM sqlite_master WHERE type = 'index' AND name = ?", (name,)
+        )
+        return row is not None
+
+    async def _page_total(
+        self, rows: List[Dict[str, Any]], offset: int, count_query: str, params: List[Any]
+    ) -> int:
+        """Strip the ``_total`` window column from a page and return its value.
+
+        An empty page has no row to carry it, so past the first page the total
+        is counted separately.
+        """
+        if rows:
+            total = rows[0]['_total']
+            for row in rows:
+                del row['_total']
+            return total
+        if not offset:
+            return 0
+        count_result = await self.fetch_one(count_query, params)
+        return count_result['count'] if count_result else 0
 
     async def get_permissions_paginated(
         self,
         offset: int = 0,
         limit: int = 100,
-        filters: Optional[Dict[str, Any]] = None
-    ) -> Tuple[List[Dict[str, Any]], int]:
+        filters: Optional[Dict[str, Any]] = None,
+        after: Optional[tuple] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[tuple]]:
         """Get permissions with pagination and optional filters.
 
+        Pass the ``next_cursor`` of one page as ``after`` to seek straight to
+        the next page instead of skipping ``offset`` rows.
+
         Returns:
-            Tuple of (permissions list, total count)
+            Tuple of (permissions list, total count, next cursor). The total
+            is only counted for the first page and is None when ``after`` is set.
         """
         # Build WHERE clause based on filters
         where_clauses = []
@@ -367,23 +1208,24 @@ class DatabaseRepository:
                 where_clauses.append("p.is_inherited = ?")
                 params.append(filters['is_inherited'])
 
-        where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        # The first page carries the filtered total as a window column
+        total_column = ", COUNT(*) OVER () AS _total" if after is None else ""
+        count_query = "SELECT COUNT(*) as count FROM permissions p"
+        count_params = list(params)
+        if where_clauses:
+            count_query += " WHERE " + " AND ".join(where_clauses)
+        if after is not None:
+            where_clauses.append("p.id < ?")
+            params.append(after[0])
+            offset = 0
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) as count FROM permissions p{where_clause}"
-        count_result = await self.fetch_one(count_query, params)
-        total_count = count_result['count'] if count_result else 0
+        where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
 
-        # Get paginated results using the view for better performance
+        # object_name/object_path are stored on each permission row, so the
+        # page is read straight off the table with no join
         query = f"""
-        SELECT
-            p.*,
-            ps.object_name,
-            ps.object_path
+        SELECT p.*{total_column}
         FROM permissions p
-        JOIN vw_permission_summary ps ON p.object_type = ps.object_type
-            AND p.object_id = ps.object_id
-            AND p.principal_id = ps.principal_id
         {where_clause}
         ORDER BY p.id DESC
         LIMIT ? OFFSET ?
@@ -391,16 +1233,30 @@ class DatabaseRepository:
         params.extend([limit, offset])
 
         results = await self.fetch_all(query, params)
-        return results, total_count
+        total_count = None
+        if after is None:
+            total_count = await self._page_total(results, offset, count_query, count_params)
+        next_cursor = (results[-1]['id'],) if len(results) == limit else None
+        return results, total_count, next_cursor
 
     async def get_files_paginated(
         self,
         offset: int = 0,
         limit: int = 100,
         filters: Optional[Dict[str, Any]] = None,
-        order_by: str = "modified_at DESC"
-    ) -> Tuple[List[Dict[str, Any]], int]:
-        """Get files with pagination and optional filters."""
+        order_by: str = "modified_at DESC",
+        after: Optional[tuple] = None
+    ) -> Tuple[List[Dict[str, Any]], Optional[int], Optional[tuple]]:
+        """Get files with pagination and optional filters.
+
+        With the default ordering, pass the ``(modified_at, id)`` ``next_cursor``
+        of one page as ``after`` to seek to the next page; the total is then
+        not recounted and comes back as None.
+        """
+        keyset = order_by == "modified_at DESC"
+        if after is not None and not keyset:
+            raise ValueError("Keyset pagination requires the default modified_at DESC ordering")
+
         where_clauses = []
         params = []
 
@@ -418,12 +1274,35 @@ class DatabaseRepository:
                 where_clauses.append("f.size_bytes >= ?")
                 params.append(filters['min_size'])
 
-        where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        # Pin the site/library composite index when it can serve both the
+        # filter and the sort; it is absent while an audit defers indexes
+        files_ref = "files f"
+        if (
+            filters and filters.get('site_id') and filters.get('library_id')
+            and keyset
+            and await self._has_index("idx_files_site_lib_mod")
+        ):
+            files_ref = "files f INDEXED BY idx_files_site_lib_mod"
+
+        # The first page carries the filtered total as a window column
+        total_column = ", COUNT(*) OVER () AS _total" if after is None else ""
+        count_query = f"SELECT COUNT(*) as count FROM {files_ref}"
+        count_params = list(params)
+        if where_clauses:
+            count_query += " WHERE " + " AND ".join(where_clauses)
+        if after is not None:
+            # NULL modified_at sorts last under DESC, after every dated file
+            after_modified, after_id = after
+            if after_modified is None:
+                where_clauses.append("f.modified_at IS NULL AND f.id < ?")
+                params.append(after_id)
+            else:
+                where_clauses.append("((f.modified_at, f.id) < (?, ?) OR f.modified_at IS NULL)")
+                params.extend([after_modified, after_id])
+            offset = 0
 
-        # Get total count
-        count_query = f"SELECT COUNT(*) as count FROM files f{where_clause}"
-        count_result = await self.fetch_one(count_query, params)
-        total_count = count_result['count'] if count_result else 0
+        where_clause = " WHERE " + " AND ".join(where_clauses) if where_clauses else ""
+        order_clause = f"f.{order_by}, f.id DESC" if keyset else f"f.{order_by}"
 
         # Get paginated results
         query = f"""
@@ -432,19 +1311,25 @@ class DatabaseRepository:
             s.title as site_title,
             s.url as site_url,
             l.name as library_name,
-            fo.name as folder_name
-        FROM files f
+            fo.name as folder_name{total_column}
+        FROM {files_ref}
         JOIN sites s ON f.site_id = s.id
         JOIN libraries l ON f.library_id = l.id
         LEFT JOIN folders fo ON f.folder_id = fo.id
         {where_clause}
-        ORDER BY f.{order_by}
+        ORDER BY {order_clause}
         LIMIT ? OFFSET ?
         """
         params.extend([limit, offset])
 
         results = await self.fetch_all(query, params)
-        return results, total_count
+        total_count = None
+        if after is None:
+            total_count = await self._page_total(results, offset, count_query, count_params)
+        next_cursor = None
+        if keyset and len(results) == limit:
+            next_cursor = (results[-1]['modified_at'], results[-1]['id'])
+        return results, total_count, next_cursor
 
     async def get_permission_stats_by_type(self) -> List[Dict[str, Any]]:
         """Get permission statistics grouped by object type."""
@@ -1,16 +1,46 @@
-import json
+from collections import OrderedDict
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional
 
 from database.repository import DatabaseRepository
+from .json_codec import loads
+
+
+class CheckpointCache(OrderedDict):
+    """LRU mapping of checkpoint states, capped at ``maxsize`` keys.
+
+    Reading or writing a key marks it most recently used; writes past the
+    cap evict the least recently used key.
+    """
+
+    def __init__(self, maxsize: int = 1024) -> None:
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __getitem__(self, key: Any) -> Any:
+        value = super().__getitem__(key)
+        self.move_to_end(key)
+        return value
+
+    def get(self, key: Any, default: Any = None) -> Any:
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __setitem__(self, key: Any, value: Any) -> None:
+        super().__setitem__(key, value)
+        self.move_to_end(key)
+        if len(self) > self.maxsize:
+            self.popitem(last=False)
 
 
 class CheckpointManager:
     """Manages checkpoints for resumable operations."""
 
-    def __init__(self, db: DatabaseRepository) -> None:
+    def __init__(self, db: DatabaseRepository, cache_size: int = 1024) -> None:
         self.db = db
-        self._cache: dict[str, Any] = {}
+        self._cache = CheckpointCache(cache_size)
 
     async def save_checkpoint(
         self, run_id: str, checkpoint_type: str, state: Any
@@ -26,7 +56,7 @@ class CheckpointManager:
             return self._cache[key]
         checkpoint = await self.db.get_latest_checkpoint(run_id, checkpoint_type)
         if checkpoint is not None:
-            state = json.loads(checkpoint["checkpoint_data"])
+            state = loads(checkpoint["checkpoint_data"])
             self._cache[key] = state
             return state
         return None
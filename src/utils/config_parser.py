@@ -1,9 +1,13 @@
 import json
+import os
 from dataclasses import dataclass, field
-from typing import Optional, List
+from functools import lru_cache
+from typing import Optional, Tuple
 
+from .json_codec import loads
 
-@dataclass
+
+@dataclass(frozen=True)
 class AuthConfig:
     tenant_id: str
     client_id: str
@@ -12,26 +16,44 @@ class AuthConfig:
     certificate_password: Optional[str] = None
 
 
-@dataclass
+@dataclass(frozen=True)
 class DbConfig:
     path: str = "audit.db"
 
 
-@dataclass
+@dataclass(frozen=True)
 class AppConfig:
     auth: AuthConfig
     db: DbConfig = field(default_factory=DbConfig)
-    target_sites: Optional[List[str]] = None
+    target_sites: Optional[Tuple[str, ...]] = None
 
 
 def load_config(config_path: str = "config/config.json") -> AppConfig:
-    """Load application configuration from a JSON file."""
+    """Load application configuration from a JSON file.
+
+    Parsed configs are cached per file path, modification time and size, so
+    repeat loads of an unchanged file return the same frozen ``AppConfig``.
+    """
+    try:
+        st = os.stat(config_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Configuration file not found at: {config_path}")
+    return _load_config_cached(os.path.abspath(config_path), st.st_mtime_ns, st.st_size)
+
+
+@lru_cache(maxsize=8)
+def _load_config_cached(config_path: str, mtime_ns: int, size: int) -> AppConfig:
     try:
-        with open(config_path, "r") as f:
-            data = json.load(f)
+        with open(config_path, "rb") as f:
+            data = loads(f.read())
         auth = AuthConfig(**data["auth"])
         db = DbConfig(**data.get("db", {}))
         target_sites = data.get("target_sites")
+        if target_sites is not None:
+            # Stored as a tuple: the cached config is shared by every caller
+            if not isinstance(target_sites, list):
+                raise TypeError("target_sites must be a list")
+            target_sites = tuple(target_sites)
         return AppConfig(auth=auth, db=db, target_sites=target_sites)
     except FileNotFoundError:
         raise FileNotFoundError(f"Configuration file not found at: {config_path}")
@@ -0,0 +1,23 @@
+"""JSON encoding and decoding through orjson when it is installed."""
+
+import json
+from typing import Any, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def loads(data: Union[bytes, str]) -> Any:
+    """Parse JSON from bytes or text."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize to UTF-8 JSON bytes, writing non-string keys as json.dumps does."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
@@ -1,17 +1,42 @@
 """Enhanced checkpoint manager with live progress saving for crash recovery."""
 
-import json
 import asyncio
 import logging
+import time
 from datetime import datetime, timedelta, timezone
-from typing import Any, Dict, Optional, Set
-from collections import defaultdict
+from functools import lru_cache
+from itertools import chain
+from typing import Any, Dict, Optional, Tuple
 
 from database.repository import DatabaseRepository
+from .checkpoint_manager import CheckpointCache
+from .json_codec import dumps_bytes, loads
 
 logger = logging.getLogger(__name__)
 
 
+@lru_cache(maxsize=1)
+def _iso_second(sec: int) -> str:
+    return datetime.fromtimestamp(sec, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S")
+
+
+def _utc_now_iso() -> str:
+    """Current UTC time in ISO 8601, formatting the date part once per second."""
+    sec, frac = divmod(time.time_ns(), 1_000_000_000)
+    return f"{_iso_second(sec)}.{frac // 1000:06d}+00:00"
+
+
+class _Entry:
+    """One checkpoint's state, plus its encoded JSON while a write is pending."""
+
+    __slots__ = ("state", "blob", "dirty")
+
+    def __init__(self, state: Any) -> None:
+        self.state = state
+        self.blob: Optional[bytes] = None
+        self.dirty = False
+
+
 class LiveCheckpointManager:
     """
     Enhanced checkpoint manager that saves progress in real-time.
@@ -27,24 +52,33 @@ class LiveCheckpointManager:
         self,
         db: DatabaseRepository,
         save_interval: int = 30,  # Save every 30 seconds
-        batch_size: int = 50      # Batch up to 50 updates
+        batch_size: int = 50,     # Batch up to 50 updates
+        cache_size: int = 1024,   # Keep up to 1024 states in memory
+        min_flush_interval: float = 1.0  # Seconds between forced flushes
     ) -> None:
         self.db = db
         self.save_interval = save_interval
         self.batch_size = batch_size
-        self._cache: Dict[str, Any] = {}
-        self._pending_updates: Dict[str, Any] = {}
+        self.min_flush_interval = min_flush_interval
+        self._last_flush = float("-inf")
+        # One entry per (run_id, checkpoint_type), in an LRU of known states
+        self._entries = CheckpointCache(cache_size)
+        # The dirty entries awaiting a flush; they survive LRU eviction here
+        self._pending_updates: Dict[Tuple[str, str], _Entry] = {}
         self._save_task: Optional[asyncio.Task] = None
         self._lock = asyncio.Lock()
 
-        # Track discovery progress
-        self._discovery_progress: Dict[str, Dict[str, Any]] = defaultdict(dict)
+    def _lookup(self, key: Tuple[str, str]) -> Optional[_Entry]:
+        entry = self._pending_updates.get(key)
+        if entry is None:
+            entry = self._entries.get(key)
+        return entry
 
     async def start(self) -> None:
         """Start the periodic save task."""
         if self._save_task is None:
             self._save_task = asyncio.create_task(self._periodic_save())
-            logger.info(f"Started live checkpoint manager with {self.save_interval}s save interval")
+            logger.info("Started live checkpoint manager with %ss save interval", self.save_interval)
 
     async def stop(self) -> None:
         """Stop the periodic save task and save any pending updates."""
@@ -69,29 +103,36 @@ class LiveCheckpointManager:
             except asyncio.CancelledError:
                 break
             except Exception as e:
-                logger.error(f"Error in periodic save: {e}", exc_info=True)
+                logger.error("Error in periodic save: %s", e, exc_info=True)
 
     async def _flush_pending_updates(self) -> None:
         """Save all pending checkpoint updates."""
+        # Idle timer ticks return without touching the lock; re-checked below
+        if not self._pending_updates:
+            return
+
         async with self._lock:
             if not self._pending_updates:
                 return
 
-            updates = list(self._pending_updates.items())
-            self._pending_updates.clear()
-
-        # Save updates in batches
+            # Take each entry's encoded JSON and mark it clean; a save that
+            # lands during the write below marks it dirty again
+            updates = []
+            for key, entry in self._pending_updates.items():
+                updates.append((*key, entry.blob))
+                entry.blob = None
+                entry.dirty = False
+            self._pending_updates = {}
+            self._last_flush = time.monotonic()
+
+        # Save updates in batches, one transaction each
         for i in range(0, len(updates), self.batch_size):
             batch = updates[i:i + self.batch_size]
             try:
-                for key, data in batch:
-                    run_id, checkpoint_type = key.split(':', 1)
-                    await self.db.save_checkpoint(run_id, checkpoint_type, data)
-                    self._cache[key] = data
-
-                logger.debug(f"Saved batch of {len(batch)} checkpoints")
+                await self.db.save_checkpoints_bulk(batch)
+                logger.debug("Saved batch of %d checkpoints", len(batch))
             except Exception as e:
-                logger.error(f"Error saving checkpoint batch: {e}", exc_info=True)
+                logger.error("Error saving checkpoint batch: %s", e, exc_info=True)
 
     async def save_checkpoint(
         self,
@@ -109,19 +150,41 @@ class LiveCheckpointManager:
             state: The state to save
             immediate: If True, save immediately instead of batching
         """
-        key = f"{run_id}:{checkpoint_type}"
+        key = (run_id, checkpoint_type)
+        blob = dumps_bytes(state)
 
         if immediate:
-            await self.db.save_checkpoint(run_id, checkpoint_type, state)
-            self._cache[key] = state
-            logger.debug(f"Saved immediate checkpoint: {checkpoint_type}")
+            await self.db.save_checkpoint(run_id, checkpoint_type, blob)
+            async with self._lock:
+                entry = self._lookup(key)
+                if entry is not None and entry.dirty:
+                    # Written just now; drop the queued copy
+                    del self._pending_updates[key]
+                    entry.blob = None
+                    entry.dirty = False
+                entry = entry or _Entry(state)
+                entry.state = state
+                self._entries[key] = entry
+            logger.debug("Saved immediate checkpoint: %s", checkpoint_type)
         else:
             async with self._lock:
-                self._pending_updates[key] = state
-
-                # Force save if batch size reached
-                if len(self._pending_updates) >= self.batch_size:
-                    await self._flush_pending_updates()
+                entry = self._lookup(key) or _Entry(state)
+                entry.state = state
+                entry.blob = blob
+                entry.dirty = True
+                self._entries[key] = entry
+                # Re-saving a queued key replaces its state, so this counts
+                # distinct checkpoints; a burst shortly after a flush is left
+                # to the periodic save instead of forcing another one
+                self._pending_updates[key] = entry
+                batch_full = (
+                    len(self._pending_updates) >= self.batch_size
+                    and time.monotonic() - self._last_flush >= self.min_flush_interval
+                )
+
+            # Force save if batch size reached (the flush takes the lock itself)
+            if batch_full:
+                await self._flush_pending_updates()
 
     async def save_discovery_progress(
         self,
@@ -143,11 +206,14 @@ class LiveCheckpointManager:
         if library_id:
             checkpoint_type += f"_{library_id}"
 
-        progress = self._discovery_progress[checkpoint_type]
+        # Accumulate onto the entry's last state rather than a side table;
+        # copied first, since callers may hold that dict
+        entry = self._lookup((run_id, checkpoint_type))
+        progress = dict(entry.state) if entry is not None and isinstance(entry.state, dict) else {}
         progress.update({
             'site_id': site_id,
             'library_id': library_id,
-            'last_updated': datetime.now(timezone.utc).isoformat(),
+            'last_updated': _utc_now_iso(),
             **(progress_data or {})
         })
 
@@ -158,23 +224,18 @@ class LiveCheckpointManager:
         run_id: str,
         checkpoint_type: str
     ) -> Optional[Any]:
-        """Restore a checkpoint from cache or database."""
-        key = f"{run_id}:{checkpoint_type}"
-
-        # Check cache first
-        if key in self._cache:
-            return self._cache[key]
+        """Restore a checkpoint from memory or database."""
+        key = (run_id, checkpoint_type)
 
-        # Check pending updates
-        async with self._lock:
-            if key in self._pending_updates:
-                return self._pending_updates[key]
+        entry = self._lookup(key)
+        if entry is not None:
+            return entry.state
 
         # Load from database
         checkpoint = await self.db.get_latest_checkpoint(run_id, checkpoint_type)
         if checkpoint is not None:
-            state = json.loads(checkpoint["checkpoint_data"])
-            self._cache[key] = state
+            state = loads(checkpoint["checkpoint_data"])
+            self._entries[key] = _Entry(state)
             return state
 
         return None
@@ -185,13 +246,13 @@ class LiveCheckpointManager:
         progress_checkpoints = {}
 
         # This would need a new repository method to get all checkpoints by pattern
-        # For now, we'll reconstruct from cache
-        for key in list(self._cache.keys()) + list(self._pending_updates.keys()):
-            if key.startswith(f"{run_id}:discovery_progress_"):
-                checkpoint_type = key.split(':', 1)[1]
-                data = self._cache.get(key) or self._pending_updates.get(key)
-                if data:
-                    progress_checkpoints[checkpoint_type] = data
+        # For now, we'll reconstruct from the in-memory entries
+        for (key_run_id, checkpoint_type), entry in chain(
+            self._entries.items(), self._pending_updates.items()
+        ):
+            if key_run_id == run_id and checkpoint_type.startswith("discovery_progress_"):
+                if entry.state:
+                    progress_checkpoints[checkpoint_type] = entry.state
 
         return {
             'total_sites': len(set(cp.get('site_id') for cp in progress_checkpoints.values())),
@@ -207,6 +268,17 @@ class LiveCheckpointManager:
         cutoff = datetime.now(timezone.utc) - timedelta(days=days)
         await self.db.delete_checkpoints_before(cutoff)
 
-        # Clear cache entries for old checkpoints
-        self._cache.clear()
-        logger.info(f"Cleaned up checkpoints older than {days} days")
+        # Evict clean states stamped before the cutoff, keeping the rest
+        for key, entry in list(self._entries.items()):
+            state = entry.state
+            last_updated = state.get('last_updated') if isinstance(state, dict) else None
+            if entry.dirty or not last_updated:
+                continue
+            try:
+                stale = datetime.fromisoformat(last_updated) < cutoff
+            except (TypeError, ValueError):
+                # Naive or non-ISO timestamps in caller state; keep the entry
+                continue
+            if stale:
+                del self._entries[key]
+        logger.info("Cleaned up checkpoints older than %s days", days)
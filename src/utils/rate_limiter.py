@@ -1,10 +1,32 @@
 import asyncio
 import time
 import logging
+from types import MappingProxyType
+from typing import Union
 
 logger = logging.getLogger(__name__)
 
 
+class Cost:
+    """Resource units charged per operation type."""
+
+    SIMPLE_GET = 2
+    COMPLEX_GET = 3
+    GET_WITH_EXPAND = 4
+    BATCH_REQUEST = 5
+    DELTA_QUERY = 1
+
+
+# Operation-name costs for callers that still pass a string
+_OPERATION_COSTS = MappingProxyType({
+    "simple_get": Cost.SIMPLE_GET,
+    "complex_get": Cost.COMPLEX_GET,
+    "get_with_expand": Cost.GET_WITH_EXPAND,
+    "batch_request": Cost.BATCH_REQUEST,
+    "delta_query": Cost.DELTA_QUERY,
+})
+
+
 class RateLimiter:
     """Simple rate limiter based on resource units per time window."""
 
@@ -12,32 +34,47 @@ class RateLimiter:
         self.resource_units = self._get_resource_units(tenant_size)
         self.window_size = 300  # seconds
         self.current_usage = 0
-        self.window_start = time.time()
+        self.window_start = time.monotonic()
+        # Only taken on the throttle path, so waiters sleep out the window in turn
         self._lock = asyncio.Lock()
-        self.operation_costs = {
-            "simple_get": 2,
-            "complex_get": 3,
-            "get_with_expand": 4,
-            "batch_request": 5,
-            "delta_query": 1,
-        }
-
-    async def acquire(self, operation_type: str = "simple_get") -> None:
-        cost = self.operation_costs.get(operation_type, 2)
-        async with self._lock:
-            now = time.time()
-            if now - self.window_start >= self.window_size:
-                self.current_usage = 0
-                self.window_start = now
+        self.operation_costs = _OPERATION_COSTS
 
-            if self.current_usage + cost > self.resource_units:
-                wait_time = self.window_size - (now - self.window_start)
+    def _try_consume(self, cost: int) -> bool:
+        """Charge ``cost`` to the current window if it fits.
+
+        Runs without an await, so on the event loop it cannot interleave with
+        another caller and needs no lock.
+        """
+        now = time.monotonic()
+        if now - self.window_start >= self.window_size:
+            self.current_usage = 0
+            self.window_start = now
+        if self.current_usage + cost > self.resource_units:
+            return False
+        self.current_usage += cost
+        return True
+
+    async def acquire(self, cost: Union[int, str] = Cost.SIMPLE_GET) -> None:
+        """Wait until ``cost`` resource units fit in the window, then charge them.
+
+        ``cost`` is normally a :class:`Cost` constant; an operation name such
+        as ``"simple_get"`` is still accepted and looked up.
+        """
+        if isinstance(cost, str):
+            cost = _OPERATION_COSTS.get(cost, Cost.SIMPLE_GET)
+        if self._try_consume(cost):
+            return
+
+        # A cost above the whole budget takes a full window rather than never fitting
+        cost = min(cost, self.resource_units)
+        async with self._lock:
+            # An earlier waiter may already have slept out the window; the
+            # fast path keeps charging while this one sleeps, so re-check
+            # through _try_consume rather than resetting the usage
+            while not self._try_consume(cost):
+                wait_time = self.window_size - (time.monotonic() - self.window_start)
                 logger.warning("Rate limit reached. Waiting %.2f seconds", wait_time)
                 await asyncio.sleep(max(wait_time, 0))
-                self.current_usage = 0
-                self.window_start = time.time()
-
-            self.current_usage += cost
 
     def _get_resource_units(self, tenant_size: str) -> int:
         limits = {"small": 6000, "medium": 9000, "large": 12000}
@@ -2,9 +2,10 @@ import asyncio
 import logging
 import random
 import time
+from collections import defaultdict
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Callable, Dict
+from typing import Any, Callable, DefaultDict
 
 from .exceptions import (
     SharePointAPIError,
@@ -66,7 +67,18 @@ class RetryStrategy:
 
     def __init__(self, config: RetryConfig) -> None:
         self.config = config
-        self.circuit_breakers: Dict[str, CircuitBreaker] = {}
+        # Delay before each retry, computed once from the config
+        self._backoff_table = tuple(
+            min(config.base_delay * (2**attempt), config.max_delay)
+            for attempt in range(config.max_attempts)
+        )
+        # Breakers are created on first use of an operation id
+        self.circuit_breakers: DefaultDict[str, CircuitBreaker] = defaultdict(
+            lambda: CircuitBreaker(
+                failure_threshold=self.config.circuit_breaker_threshold,
+                recovery_timeout=self.config.circuit_breaker_timeout,
+            )
+        )
 
     async def execute_with_retry(self, operation_id: str, func: Callable, *args, **kwargs) -> Any:
         breaker = self._get_circuit_breaker(operation_id)
@@ -75,10 +87,15 @@ class RetryStrategy:
 
         attempt = 0
         last_error: Exception | None = None
+        # Checked once per call so the per-attempt debug lines cost nothing at INFO
+        debug = logger.isEnabledFor(logging.DEBUG)
 
         while attempt < self.config.max_attempts:
             try:
-                logger.debug(f"[RETRY] Attempt {attempt + 1}/{self.config.max_attempts} for {operation_id}")
+                if debug:
+                    logger.debug(
+                        "[RETRY] Attempt %d/%d for %s", attempt + 1, self.config.max_attempts, operation_id
+                    )
 
                 # Execute with timeout
                 try:
@@ -87,7 +104,9 @@ class RetryStrategy:
                         timeout=self.config.request_timeout
                     )
                 except asyncio.TimeoutError:
-                    logger.error(f"[RETRY] Request timeout after {self.config.request_timeout}s for {operation_id}")
+                    logger.error(
+                        "[RETRY] Request timeout after %ss for %s", self.config.request_timeout, operation_id
+                    )
                     raise TimeoutError(f"Request timed out after {self.config.request_timeout}s")
 
                 breaker.record_success()
@@ -98,28 +117,24 @@ class RetryStrategy:
 
                 # Log the error with context
                 logger.warning(
-                    f"[RETRY] Attempt {attempt + 1} failed for {operation_id}: {type(exc).__name__}: {str(exc)}"
+                    "[RETRY] Attempt %d failed for %s: %s: %s",
+                    attempt + 1, operation_id, type(exc).__name__, exc
                 )
 
                 if not self._is_retryable(exc) or attempt >= self.config.max_attempts - 1:
-                    logger.error(f"[RETRY] Giving up on {operation_id} after {attempt + 1} attempts")
+                    logger.error("[RETRY] Giving up on %s after %d attempts", operation_id, attempt + 1)
                     raise
 
                 backoff = self._calculate_backoff(attempt)
-                jitter = random.uniform(0, backoff * 0.1)
-                delay = backoff + jitter
-                logger.debug(f"[RETRY] Waiting {delay:.2f}s before retry")
+                delay = backoff + random.random() * backoff * 0.1
+                if debug:
+                    logger.debug("[RETRY] Waiting %.2fs before retry", delay)
                 await asyncio.sleep(delay)
                 attempt += 1
 
         raise MaxRetriesExceededError(f"Max retries exceeded for {operation_id}: {last_error}")
 
     def _get_circuit_breaker(self, operation_id: str) -> CircuitBreaker:
-        if operation_id not in self.circuit_breakers:
-            self.circuit_breakers[operation_id] = CircuitBreaker(
-                failure_threshold=self.config.circuit_breaker_threshold,
-                recovery_timeout=self.config.circuit_breaker_timeout,
-            )
         return self.circuit_breakers[operation_id]
 
     def _is_retryable(self, error: Exception) -> bool:
@@ -136,5 +151,6 @@ class RetryStrategy:
         return False
 
     def _calculate_backoff(self, attempt: int) -> float:
-        delay = min(self.config.base_delay * (2**attempt), self.config.max_delay)
-        return delay
+        if attempt < len(self._backoff_table):
+            return self._backoff_table[attempt]
+        return min(self.config.base_delay * (2**attempt), self.config.max_delay)
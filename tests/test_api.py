@@ -1,5 +1,6 @@
 import pytest
 import asyncio
+import time
 from unittest.mock import AsyncMock, patch
 
 from src.utils.exceptions import CircuitBreakerOpenError
@@ -78,3 +79,56 @@ def test_circuit_breaker_opens(retry_strategy):
             await retry_strategy.execute_with_retry("test", failing_func)
 
     asyncio.run(run())
+
+
+def test_rate_limiter_throttles_only_over_budget():
+    from src.utils.rate_limiter import Cost, RateLimiter
+
+    async def run():
+        limiter = RateLimiter("small")
+        limiter.resource_units = 10
+        limiter.window_size = 0.05
+        for _ in range(4):
+            await limiter.acquire(Cost.SIMPLE_GET)
+        await limiter.acquire("simple_get")
+        assert limiter.current_usage == 10
+        assert not limiter._lock.locked()
+
+        # The next call waits out the window and starts a new one
+        await asyncio.wait_for(limiter.acquire(Cost.BATCH_REQUEST), timeout=1)
+        assert limiter.current_usage == 5
+
+    asyncio.run(run())
+
+
+def test_rate_limiter_waiter_keeps_fast_path_charges():
+    from src.utils.rate_limiter import RateLimiter
+
+    async def run():
+        limiter = RateLimiter("small")
+        limiter.resource_units = 10
+        limiter.window_size = 0.2
+        await limiter.acquire(10)
+        waiter = asyncio.create_task(limiter.acquire(5))
+        await asyncio.sleep(0)
+        assert limiter._lock.locked()
+
+        # Just before the waiter wakes the window runs out and a fast-path
+        # caller opens a new one with a charge of 8
+        await asyncio.sleep(limiter.window_size * 0.8)
+        limiter.window_start -= limiter.window_size
+        await limiter.acquire(8)
+        charged_at = time.monotonic()
+        await asyncio.wait_for(waiter, timeout=2)
+        # 8 + 5 does not fit one window, so the waiter has to sit out the next one
+        assert time.monotonic() - charged_at >= limiter.window_size * 0.9
+        assert limiter.current_usage == 5
+
+    asyncio.run(run())
+
+
+def test_backoff_table(retry_strategy):
+    cfg = retry_strategy.config
+    for attempt in range(cfg.max_attempts + 3):
+        expected = min(cfg.base_delay * (2**attempt), cfg.max_delay)
+        assert retry_strategy._calculate_backoff(attempt) == expected
@@ -0,0 +1,182 @@
+"""Tests for the checkpoint managers against a real database."""
+
+import asyncio
+import json
+from datetime import datetime, timezone
+
+import pytest
+
+from src.database.repository import DatabaseRepository
+from src.utils.live_checkpoint_manager import LiveCheckpointManager, _Entry
+
+
+@pytest.fixture
+def db_repo(tmp_path):
+    repo = DatabaseRepository(str(tmp_path / "checkpoints.db"))
+    asyncio.run(repo.initialize_database())
+    return repo
+
+
+def test_live_manager_flushes_full_batch(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=3)
+        for i in range(3):
+            # The third save fills the batch and flushes it
+            await asyncio.wait_for(
+                manager.save_checkpoint("run-1", f"site_{i}", {"done": i}), timeout=5
+            )
+        rows = await db_repo.fetch_all("SELECT checkpoint_type FROM audit_checkpoints ORDER BY id")
+        assert [row["checkpoint_type"] for row in rows] == ["site_0", "site_1", "site_2"]
+        assert manager._pending_updates == {}
+        assert manager._entries["run-1", "site_2"].state == {"done": 2}
+        assert not manager._entries["run-1", "site_2"].dirty
+
+        checkpoint = await db_repo.get_latest_checkpoint("run-1", "site_1")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"done": 1}
+
+    asyncio.run(run())
+
+
+def test_live_manager_stop_flushes_pending(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=50)
+        await manager.save_checkpoint("run-1", "stage", {"stage": "discovery"})
+        assert await db_repo.count_rows("audit_checkpoints") == 0
+        await manager.stop()
+        assert await db_repo.count_rows("audit_checkpoints") == 1
+        assert await manager.restore_checkpoint("run-1", "stage") == {"stage": "discovery"}
+
+    asyncio.run(run())
+
+
+def test_live_manager_encodes_state_on_enqueue(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=50)
+        progress = {"files": 1}
+        await manager.save_checkpoint("run-1", "progress", progress)
+        entry = manager._pending_updates["run-1", "progress"]
+        assert entry.state is progress
+        assert json.loads(entry.blob) == {"files": 1}
+
+        # Later mutation does not change what was queued for the database
+        progress["files"] = 2
+        await manager.stop()
+        checkpoint = await db_repo.get_latest_checkpoint("run-1", "progress")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"files": 1}
+
+        await manager.save_checkpoint("run-1", "stage", {"stage": "done"}, immediate=True)
+        checkpoint = await db_repo.get_latest_checkpoint("run-1", "stage")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"stage": "done"}
+
+    asyncio.run(run())
+
+
+def test_checkpoint_manager_restores_from_database(db_repo):
+    async def run():
+        from src.utils.checkpoint_manager import CheckpointManager
+
+        await CheckpointManager(db_repo).save_checkpoint("run-1", "sites", {"ids": [1, 2]})
+        # A fresh manager has an empty cache and decodes the stored JSON
+        assert await CheckpointManager(db_repo).restore_checkpoint("run-1", "sites") == {"ids": [1, 2]}
+
+    asyncio.run(run())
+
+
+def test_discovery_progress_timestamp(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo)
+        before = datetime.now(timezone.utc)
+        await manager.save_discovery_progress("run-1", "site-a", "lib-1", {"files": 3})
+        await manager.save_discovery_progress("run-2", "site-b", None, {"files": 1})
+        summary = await manager.get_discovery_progress_summary("run-1")
+        stamp = datetime.fromisoformat(summary["last_update"])
+        assert stamp.tzinfo is not None
+        assert abs((stamp - before).total_seconds()) < 5
+        assert summary["total_sites"] == 1
+
+    asyncio.run(run())
+
+
+def test_checkpoint_cache_is_bounded_lru():
+    from src.utils.checkpoint_manager import CheckpointCache
+
+    cache = CheckpointCache(maxsize=2)
+    cache["a"] = 1
+    cache["b"] = 2
+    assert cache["a"] == 1  # "a" is now the most recent
+    cache["c"] = 3
+    assert list(cache) == ["a", "c"]
+    cache.update({"d": 4})
+    assert list(cache) == ["c", "d"]
+    assert cache.get("c") == 3  # .get() refreshes recency too
+    cache["e"] = 5
+    assert list(cache) == ["c", "e"]
+    assert cache.get("missing") is None
+
+
+def test_live_cleanup_keeps_recent_states(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo)
+        stale = {"last_updated": "2000-01-01T00:00:00+00:00"}
+        manager._entries["run-1", "old"] = _Entry(stale)
+        manager._entries["run-1", "new"] = _Entry({"last_updated": datetime.now(timezone.utc).isoformat()})
+        manager._entries["run-1", "plain"] = _Entry(["no", "timestamp"])
+        manager._entries["run-1", "naive"] = _Entry({"last_updated": "2000-01-01T00:00:00"})
+        manager._entries["run-1", "text"] = _Entry({"last_updated": "yesterday"})
+        await manager.save_checkpoint("run-1", "unsaved", dict(stale))
+        await manager.cleanup_old_checkpoints(days=7)
+        assert set(manager._entries) == {
+            ("run-1", "new"), ("run-1", "plain"), ("run-1", "unsaved"),
+            ("run-1", "naive"), ("run-1", "text"),
+        }
+
+    asyncio.run(run())
+
+
+def test_live_manager_spaces_forced_flushes(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=2, min_flush_interval=60)
+        # A churny key is one pending checkpoint however often it is saved
+        for i in range(5):
+            await manager.save_checkpoint("run-1", "hot", {"n": i})
+        assert await db_repo.count_rows("audit_checkpoints") == 0
+
+        await manager.save_checkpoint("run-1", "other", {"n": 0})
+        assert await db_repo.count_rows("audit_checkpoints") == 2
+
+        # A full batch right after a flush waits for the periodic save
+        await manager.save_checkpoint("run-1", "a", {})
+        await manager.save_checkpoint("run-1", "b", {})
+        assert len(manager._pending_updates) == 2
+        await manager.stop()
+        assert await db_repo.count_rows("audit_checkpoints") == 4
+
+    asyncio.run(run())
+
+
+def test_live_manager_keeps_evicted_dirty_entries(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=50, cache_size=1)
+        await manager.save_checkpoint("run-1", "first", {"n": 1})
+        await manager.save_checkpoint("run-1", "second", {"n": 2})
+        assert list(manager._entries) == [("run-1", "second")]
+        assert await manager.restore_checkpoint("run-1", "first") == {"n": 1}
+        await manager.stop()
+        assert await db_repo.count_rows("audit_checkpoints") == 2
+
+    asyncio.run(run())
+
+
+def test_discovery_progress_accumulates_on_copy(db_repo):
+    async def run():
+        manager = LiveCheckpointManager(db_repo, batch_size=50)
+        await manager.save_discovery_progress("run-1", "site-a", None, {"folders": 2})
+        state = await manager.restore_checkpoint("run-1", "discovery_progress_site-a")
+        await manager.save_discovery_progress("run-1", "site-a", None, {"files": 5})
+        # Fields from earlier calls are kept, without touching the caller's dict
+        assert "files" not in state
+        entry = manager._pending_updates["run-1", "discovery_progress_site-a"]
+        assert entry.state["folders"] == 2 and entry.state["files"] == 5
+        assert json.loads(entry.blob)["files"] == 5
+
+    asyncio.run(run())
@@ -0,0 +1,58 @@
+"""Tests for loading the application configuration file."""
+
+import dataclasses
+import json
+import os
+
+import pytest
+
+from src.utils.config_parser import load_config
+
+
+def _write_config(path, tenant_id, **extra):
+    path.write_text(json.dumps({
+        "auth": {"tenant_id": tenant_id, "client_id": "client", "certificate_path": "cert.pem"},
+        "db": {"path": "audit.db"},
+        **extra,
+    }))
+
+
+def test_load_config_cached_until_file_changes(tmp_path):
+    config_path = tmp_path / "config.json"
+    _write_config(config_path, "tenant-a")
+
+    first = load_config(str(config_path))
+    assert first.auth.tenant_id == "tenant-a"
+    assert load_config(str(config_path)) is first
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        first.db.path = "other.db"
+
+    _write_config(config_path, "tenant-bb")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert load_config(str(config_path)).auth.tenant_id == "tenant-bb"
+
+
+def test_load_config_errors(tmp_path):
+    with pytest.raises(FileNotFoundError):
+        load_config(str(tmp_path / "missing.json"))
+
+    bad = tmp_path / "bad.json"
+    bad.write_text("{not json")
+    with pytest.raises(ValueError):
+        load_config(str(bad))
+
+
+def test_load_config_target_sites_immutable(tmp_path):
+    config_path = tmp_path / "config.json"
+    _write_config(config_path, "tenant-a", target_sites=["https://t/s1", "https://t/s2"])
+
+    config = load_config(str(config_path))
+    assert config.target_sites == ("https://t/s1", "https://t/s2")
+    assert hash(config) == hash(load_config(str(config_path)))
+
+    _write_config(config_path, "tenant-a", target_sites="https://t/s1")
+    stat = config_path.stat()
+    os.utime(config_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    with pytest.raises(ValueError):
+        load_config(str(config_path))
@@ -1,6 +1,9 @@
 import pytest
 import sqlite3
 import asyncio
+import json
+import threading
+from datetime import datetime, timedelta, timezone
 
 from src.database import DatabaseRepository
 
@@ -68,3 +71,773 @@ def test_transaction_rollback(db_repo):
     asyncio.run(run())
 
 
+def test_refresh_permission_summary(db_repo):
+    permissions = [
+        {
+            "object_type": "file",
+            "object_id": f"f{i}",
+            "principal_type": "user",
+            "principal_id": f"u{i % 3}",
+            "permission_level": "Read",
+            "is_external": i % 2,
+            "is_inherited": 1,
+        }
+        for i in range(10)
+    ]
+
+    async def run():
+        await db_repo.bulk_insert("permissions", permissions)
+        await db_repo.refresh_materialized_views("run-1")
+        # Refreshing again replaces rather than appends
+        await db_repo.refresh_materialized_views("run-2")
+
+        rows = await db_repo.fetch_all("SELECT * FROM permission_summary")
+        assert len(rows) == 1
+        assert rows[0]["run_id"] == "run-2"
+        assert rows[0]["count"] == 10
+        assert rows[0]["unique_principals"] == 3
+        assert rows[0]["external_count"] == 5
+
+    asyncio.run(run())
+
+
+def test_refresh_materialized_views(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1", "title": "Site 1"}])
+        await db_repo.bulk_insert(
+            "permissions",
+            [
+                {
+                    "object_type": "site",
+                    "object_id": "s1",
+                    "principal_type": "user",
+                    "principal_id": "u1",
+                    "permission_level": "Read",
+                    "is_external": 1,
+                    "object_name": "Site 1",
+                    "object_path": "https://t/s1",
+                }
+            ],
+        )
+        # Before the refresh the live view stands in for the empty table
+        live = await db_repo.get_permission_summary()
+        assert [r["principal_id"] for r in live] == ["u1"]
+        await db_repo.refresh_materialized_views("run-1")
+        await db_repo.refresh_materialized_views("run-1")
+        marker = await db_repo.fetch_one("SELECT run_id, max_permission_id FROM mv_refresh_state")
+        assert marker == {"run_id": "run-1", "max_permission_id": 1}
+
+        rows = await db_repo.get_permission_summary()
+        assert len(rows) == 1
+        assert [dict(r) async for r in db_repo.iter_permission_summary(chunk_size=1)] == rows
+        assert rows[0]["object_name"] == "Site 1"
+        assert rows[0]["object_path"] == "https://t/s1"
+        assert await db_repo.count_rows("permission_summary") == 1
+        assert await db_repo.count_rows("storage_analytics") == 1
+
+        # Permissions written after the refresh are read live again
+        await db_repo.bulk_insert("permissions", [
+            {"object_type": "site", "object_id": "s1", "principal_type": "user",
+             "principal_id": "u2", "permission_level": "Edit"}
+        ])
+        rows = await db_repo.get_permission_summary()
+        assert sorted(r["principal_id"] for r in rows) == ["u1", "u2"]
+
+        # Same row count, different rows: still detected as stale
+        await db_repo.refresh_materialized_views("run-2")
+        await db_repo.execute("DELETE FROM permissions WHERE principal_id = 'u1'")
+        await db_repo.bulk_insert("permissions", [
+            {"object_type": "site", "object_id": "s1", "principal_type": "user",
+             "principal_id": "u3", "permission_level": "Read"}
+        ])
+        rows = await db_repo.get_permission_summary()
+        assert sorted(r["principal_id"] for r in rows) == ["u2", "u3"]
+
+        # A delete alone clears the marker too
+        await db_repo.refresh_materialized_views("run-3")
+        await db_repo.execute("DELETE FROM permissions WHERE principal_id = 'u2'")
+        rows = await db_repo.get_permission_summary()
+        assert [r["principal_id"] for r in rows] == ["u3"]
+
+    asyncio.run(run())
+
+
+def test_fetch_typed(db_repo):
+    np = pytest.importorskip("numpy")
+    sites = [
+        {"site_id": f"s{i}", "url": f"https://t/s{i}", "title": f"Site {i}",
+         "storage_used": i * 100, "storage_quota": None if i == 2 else 1000}
+        for i in range(5)
+    ]
+
+    async def run():
+        await db_repo.bulk_insert("sites", sites)
+        # A small chunk size makes the rows arrive over several batches
+        columns = await db_repo.fetch_typed(
+            "SELECT title, storage_used, storage_quota FROM sites ORDER BY id",
+            {"storage_used": "int64", "storage_quota": "float64"},
+            chunk_size=2,
+        )
+        assert columns["storage_used"].dtype == np.int64
+        assert columns["storage_used"].tolist() == [0, 100, 200, 300, 400]
+        # NULL reads as NaN in float columns
+        assert np.isnan(columns["storage_quota"][2])
+        assert columns["storage_quota"][[0, 1, 3, 4]].tolist() == [1000.0] * 4
+        assert columns["title"].dtype == object
+        assert columns["title"][4] == "Site 4"
+
+        empty = await db_repo.fetch_typed(
+            "SELECT storage_used FROM sites WHERE 0", {"storage_used": "int64"}
+        )
+        assert len(empty["storage_used"]) == 0
+
+    asyncio.run(run())
+
+
+def test_site_storage_generated_columns(db_repo):
+    sites = [
+        {"site_id": "full", "url": "https://t/full", "storage_used": 1 << 30, "storage_quota": 1 << 31},
+        {"site_id": "no-quota", "url": "https://t/no-quota", "storage_used": 1 << 30, "storage_quota": 0},
+        {"site_id": "unknown", "url": "https://t/unknown", "storage_used": None, "storage_quota": None},
+    ]
+
+    async def run():
+        await db_repo.bulk_insert("sites", sites)
+        rows = await db_repo.fetch_all(
+            "SELECT site_id, storage_used_gb, storage_utilization FROM sites ORDER BY id"
+        )
+        assert [(r["storage_used_gb"], r["storage_utilization"]) for r in rows] == [
+            (1.0, 50.0),
+            (1.0, 0),
+            (0.0, 0),
+        ]
+
+    asyncio.run(run())
+
+
+def test_refresh_storage_analytics(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1", "title": "Site 1"}])
+        await db_repo.bulk_insert("libraries", [
+            {"library_id": "l1", "site_id": 1, "site_url": "https://t/s1", "name": "Docs"}
+        ])
+        await db_repo.bulk_insert("files", [
+            {"file_id": f"f{i}", "name": f"doc{i}.txt", "server_relative_url": f"/docs/doc{i}.txt",
+             "library_id": 1, "site_id": 1, "site_url": "https://t/s1", "size_bytes": (i + 1) * 100}
+            for i in range(3)
+        ])
+        await db_repo.refresh_materialized_views("run-1")
+        # Refreshing again replaces rather than appends
+        await db_repo.refresh_materialized_views("run-2")
+
+        rows = await db_repo.fetch_all("SELECT * FROM storage_analytics")
+        assert len(rows) == 1
+        assert rows[0]["run_id"] == "run-2"
+        assert rows[0]["site_title"] == "Site 1"
+        assert rows[0]["library_count"] == 1
+        assert rows[0]["file_count"] == 3
+        assert rows[0]["total_size_bytes"] == 600
+        assert rows[0]["avg_file_size"] == 200
+
+    asyncio.run(run())
+
+
+def test_fetch_dataframe(db_repo):
+    pytest.importorskip("pandas")
+    sites = [
+        {"site_id": f"s{i}", "url": f"https://t/s{i}", "title": f"Site {i}", "storage_used": i}
+        for i in range(3)
+    ]
+    asyncio.run(db_repo.bulk_insert("sites", sites))
+
+    df = db_repo.fetch_dataframe(
+        "SELECT title, storage_used FROM sites WHERE storage_used >= ? ORDER BY id",
+        (1,),
+        dtype={"storage_used": "int64"},
+    )
+    assert df["title"].tolist() == ["Site 1", "Site 2"]
+    assert str(df["storage_used"].dtype) == "int64"
+
+
+def test_configure_readonly_applies_read_pragmas(db_repo):
+    async def run():
+        before = await db_repo.fetch_one("PRAGMA cache_size")
+        db_repo.configure_readonly()
+        after = await db_repo.fetch_one("PRAGMA cache_size")
+        temp_store = await db_repo.fetch_one("PRAGMA temp_store")
+        assert before["cache_size"] != -65536
+        assert after["cache_size"] == -65536
+        assert temp_store["temp_store"] == 2  # MEMORY
+
+    asyncio.run(run())
+
+
+def test_configure_readonly_reopens_checked_out_connections(db_repo):
+    with db_repo._pool.connection() as held:
+        db_repo.configure_readonly()
+    # Returned after the reconfiguration, so closed rather than reused
+    with pytest.raises(sqlite3.ProgrammingError):
+        held.execute("SELECT 1")
+    with db_repo._pool.connection() as conn:
+        assert conn.execute("PRAGMA cache_size").fetchone()[0] == -65536
+    assert db_repo._pool._opened == 1
+
+
+def test_pooled_connections(tmp_path):
+    repo = DatabaseRepository(str(tmp_path / "pool.db"), pool_size=2)
+
+    async def run():
+        await repo.initialize_database()
+        await repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1"}])
+
+        # Per-connection PRAGMAs are applied when the pool opens a connection
+        sync = await repo.fetch_one("PRAGMA synchronous")
+        assert sync["synchronous"] == 1  # NORMAL
+
+        # More concurrent callers than connections wait for a free one
+        results = await asyncio.gather(*(repo.fetch_all("SELECT * FROM sites") for _ in range(10)))
+        assert all(len(rows) == 1 for rows in results)
+
+    asyncio.run(run())
+    repo.close()
+
+
+def test_concurrent_writes_share_writer(db_repo):
+    async def run():
+        await db_repo.initialize_database()
+        await asyncio.gather(
+            *(db_repo.save_checkpoint("run1", f"step{i}", {"i": i}) for i in range(20))
+        )
+        assert await db_repo.count_rows("audit_checkpoints") == 20
+        assert db_repo._writer_conn is not None
+        assert not db_repo._writer_conn.in_transaction
+
+    asyncio.run(run())
+
+
+def test_deferred_indexes(tmp_path):
+    repo = DatabaseRepository(str(tmp_path / "deferred.db"))
+    index_query = "SELECT name FROM sqlite_master WHERE type = 'index' AND name = ?"
+
+    async def run():
+        await repo.initialize_database(defer_indexes=True)
+        assert await repo.fetch_one(index_query, ("idx_permissions_object",)) is None
+        await repo.finalize_indexes()
+        assert await repo.fetch_one(index_query, ("idx_permissions_object",)) is not None
+        assert await repo.fetch_one(index_query, ("idx_files_composite_site",)) is not None
+
+    asyncio.run(run())
+    repo.close()
+
+
+def test_bulk_insert_streams_optional_fields(db_repo):
+    async def run():
+        sites = ({"site_id": f"s{i}", "url": f"https://t/s{i}"} for i in range(2500))
+        assert await db_repo.bulk_insert("sites", sites) == 2500
+        # Keys missing from later records bind NULL, as in bulk_upsert
+        assert await db_repo.bulk_insert(
+            "sites", [{"site_id": "x", "url": "u", "title": "X"}, {"site_id": "y", "url": "v"}]
+        ) == 2
+        rows = await db_repo.fetch_all(
+            "SELECT site_id, url, title FROM sites WHERE site_id IN ('x', 'y') ORDER BY site_id"
+        )
+        assert rows == [
+            {"site_id": "x", "url": "u", "title": "X"},
+            {"site_id": "y", "url": "v", "title": None},
+        ]
+        assert await db_repo.count_rows("sites") == 2502
+
+    asyncio.run(run())
+
+
+def test_checkpoint_data_compressed(db_repo):
+    async def run():
+        state = {"sites": [f"site-{i}" for i in range(200)]}
+        await db_repo.save_checkpoint("run1", "discovery", state)
+        raw = await db_repo.fetch_one("SELECT checkpoint_data FROM audit_checkpoints")
+        assert isinstance(raw["checkpoint_data"], bytes)
+        assert len(raw["checkpoint_data"]) < len(json.dumps(state))
+
+        checkpoint = await db_repo.get_latest_checkpoint("run1", "discovery")
+        assert json.loads(checkpoint["checkpoint_data"]) == state
+
+        # Rows written before compression still read back as JSON text
+        await db_repo.execute(
+            "INSERT INTO audit_checkpoints (run_id, checkpoint_type, checkpoint_data) VALUES (?, ?, ?)",
+            ("run2", "discovery", json.dumps(state)),
+        )
+        checkpoint = await db_repo.get_latest_checkpoint("run2", "discovery")
+        assert json.loads(checkpoint["checkpoint_data"]) == state
+
+        # Non-string keys serialize the way json.dumps writes them
+        await db_repo.save_checkpoint("run3", "discovery", {1: "a"})
+        checkpoint = await db_repo.get_latest_checkpoint("run3", "discovery")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"1": "a"}
+
+    asyncio.run(run())
+
+
+def test_bulk_phase_toggles_writer_sync(db_repo):
+    async def run():
+        await db_repo.begin_bulk_phase()
+        assert db_repo._writer_conn.execute("PRAGMA synchronous").fetchone()[0] == 0
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1"}])
+        assert await db_repo.count_rows("sites") == 1
+        await db_repo.end_bulk_phase()
+        assert db_repo._writer_conn.execute("PRAGMA synchronous").fetchone()[0] == 1
+
+    asyncio.run(run())
+
+
+def test_checkpoint_created_at_epoch(db_repo):
+    async def run():
+        await db_repo.save_checkpoint("run1", "discovery", {"done": True})
+        checkpoint = await db_repo.get_latest_checkpoint("run1", "discovery")
+        assert isinstance(checkpoint["created_at"], int)
+
+        now = datetime.now(timezone.utc)
+        await db_repo.delete_checkpoints_before(now - timedelta(hours=1))
+        assert await db_repo.count_rows("audit_checkpoints") == 1
+        await db_repo.delete_checkpoints_before(now + timedelta(hours=1))
+        assert await db_repo.count_rows("audit_checkpoints") == 0
+
+    asyncio.run(run())
+
+
+def test_latest_checkpoint_breaks_same_second_ties(db_repo):
+    async def run():
+        for n in range(4):
+            await db_repo.save_checkpoint("run1", "progress", {"n": n})
+        checkpoint = await db_repo.get_latest_checkpoint("run1", "progress")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"n": 3}
+        index = await db_repo.fetch_one(
+            "SELECT name FROM sqlite_master WHERE name LIKE 'idx_checkpoints_%'"
+        )
+        assert index == {"name": "idx_checkpoints_latest"}
+
+    asyncio.run(run())
+
+
+def test_schema_includes_migrated_columns():
+    from src.database.models import MIGRATION_STATEMENTS, SCHEMA_STATEMENTS
+
+    conn = sqlite3.connect(":memory:")
+    conn.executescript("\n".join(SCHEMA_STATEMENTS))
+    for stmt in MIGRATION_STATEMENTS:
+        _, _, table, _, _, column = stmt.split()[:6]
+        columns = {r[1] for r in conn.execute(f"PRAGMA table_xinfo({table})")}
+        assert column in columns, stmt
+
+
+def test_save_site_upserts_and_returns_id(db_repo):
+    async def run():
+        site_id = await db_repo.save_site({"site_id": "s1", "url": "https://t/s1", "title": "Old"})
+        assert isinstance(site_id, int)
+        again = await db_repo.save_site({"site_id": "s1", "url": "https://t/s1", "title": "New"})
+        assert again == site_id
+        site = await db_repo.get_site("s1")
+        assert site["id"] == site_id
+        assert site["title"] == "New"
+
+    asyncio.run(run())
+
+
+def test_bulk_insert_stream(db_repo):
+    async def sites(prefix, count):
+        for i in range(count):
+            await asyncio.sleep(0)
+            yield {"site_id": f"{prefix}{i}", "url": f"https://t/{prefix}{i}"}
+
+    async def run():
+        assert await db_repo.bulk_insert_stream("sites", sites("a", 2500), batch_size=1000) == 2500
+        # bulk_insert hands async iterators to the streaming path
+        assert await db_repo.bulk_insert("sites", sites("b", 10)) == 10
+        assert await db_repo.count_rows("sites") == 2510
+
+    asyncio.run(run())
+
+
+def test_summaries_single_query(db_repo):
+    async def run():
+        empty = await db_repo.get_permissions_summary()
+        assert empty == {"total_permissions": 0, "unique_permissions": 0, "permissions_by_level": {}}
+        assert (await db_repo.get_sites_summary())["total_size_bytes"] == 0
+
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1"}])
+        await db_repo.bulk_insert(
+            "permissions",
+            [
+                {
+                    "object_type": "site",
+                    "object_id": "s1",
+                    "principal_type": "user",
+                    "principal_id": f"u{i}",
+                    "permission_level": "Read" if i % 2 else "Edit",
+                    "is_inherited": int(i < 3),
+                }
+                for i in range(5)
+            ],
+        )
+        sites = await db_repo.get_sites_summary()
+        assert sites["total_sites"] == 1 and sites["total_files"] == 0
+        perms = await db_repo.get_permissions_summary()
+        assert perms["total_permissions"] == 5
+        assert perms["unique_permissions"] == 2
+        assert perms["permissions_by_level"] == {"Read": 2, "Edit": 3}
+
+    asyncio.run(run())
+
+
+def test_bulk_upsert_updates_existing_rows(db_repo):
+    async def run():
+        sites = [{"site_id": f"s{i}", "url": f"https://t/s{i}", "title": "Old"} for i in range(5)]
+        assert await db_repo.bulk_upsert("sites", sites, ["site_id"], batch_size=2) == 5
+        # Later records may omit optional fields; those bind as NULL
+        updates = [{"site_id": "s0", "url": "https://t/s0", "title": "New"}, {"site_id": "s1", "url": "https://t/s1"}]
+        await db_repo.bulk_upsert("sites", updates, ["site_id"])
+
+        assert await db_repo.count_rows("sites") == 5
+        assert (await db_repo.get_site("s0"))["title"] == "New"
+        assert (await db_repo.get_site("s1"))["title"] is None
+
+    asyncio.run(run())
+
+
+def test_bulk_insert_defer_indexes(db_repo):
+    index_query = "SELECT COUNT(*) AS n FROM sqlite_master WHERE type = 'index' AND tbl_name = 'permissions'"
+
+    async def run():
+        before = (await db_repo.fetch_one(index_query))["n"]
+        permissions = [
+            {
+                "object_type": "file",
+                "object_id": f"f{i}",
+                "principal_type": "user",
+                "principal_id": f"u{i % 7}",
+                "permission_level": "Read",
+            }
+            for i in range(3000)
+        ]
+        assert await db_repo.bulk_insert("permissions", permissions, defer_indexes=True) == 3000
+        assert (await db_repo.fetch_one(index_query))["n"] == before
+        stats = await db_repo.fetch_all("SELECT * FROM sqlite_stat1 WHERE tbl = 'permissions'")
+        assert stats
+
+    asyncio.run(run())
+
+
+def test_files_paginated_uses_site_library_index(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1", "title": "Site 1"}])
+        await db_repo.bulk_insert("libraries", [
+            {"library_id": "l1", "site_id": 1, "site_url": "https://t/s1", "name": "Docs"}
+        ])
+        await db_repo.bulk_insert("files", [
+            {"file_id": f"f{i}", "name": f"doc{i}.txt", "server_relative_url": f"/docs/doc{i}.txt",
+             "library_id": 1, "site_id": 1, "site_url": "https://t/s1",
+             "modified_at": f"2024-01-0{i + 1}T00:00:00"}
+            for i in range(3)
+        ])
+        assert await db_repo._has_index("idx_files_site_lib_mod")
+        plan = await db_repo.fetch_all(
+            "EXPLAIN QUERY PLAN SELECT * FROM files WHERE site_id = 1 AND library_id = 1 "
+            "ORDER BY modified_at DESC"
+        )
+        assert any("idx_files_site_lib_mod" in row["detail"] for row in plan)
+
+        rows, total, cursor = await db_repo.get_files_paginated(
+            limit=2, filters={"site_id": 1, "library_id": 1}
+        )
+        assert total == 3
+        assert [row["file_id"] for row in rows] == ["f2", "f1"]
+        assert rows[0]["library_name"] == "Docs"
+        assert cursor == ("2024-01-02T00:00:00", 2)
+
+    asyncio.run(run())
+
+
+def test_paginated_keyset_cursor(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1", "title": "Site 1"}])
+        await db_repo.bulk_insert("libraries", [
+            {"library_id": "l1", "site_id": 1, "site_url": "https://t/s1", "name": "Docs"}
+        ])
+        # Two files share a timestamp and one has none, so ties and NULLs cross page edges
+        modified = ["2024-01-01", "2024-01-03", "2024-01-03", None, "2024-01-02"]
+        await db_repo.bulk_insert("files", [
+            {"file_id": f"f{i}", "name": f"doc{i}.txt", "server_relative_url": f"/docs/doc{i}.txt",
+             "library_id": 1, "site_id": 1, "site_url": "https://t/s1", "modified_at": value}
+            for i, value in enumerate(modified)
+        ])
+
+        seen = []
+        rows, total, cursor = await db_repo.get_files_paginated(limit=2)
+        assert total == 5
+        seen += [row["file_id"] for row in rows]
+        while cursor:
+            rows, total, cursor = await db_repo.get_files_paginated(limit=2, after=cursor)
+            assert total is None
+            seen += [row["file_id"] for row in rows]
+        assert seen == ["f2", "f1", "f4", "f0", "f3"]
+
+        with pytest.raises(ValueError):
+            await db_repo.get_files_paginated(order_by="size_bytes DESC", after=("x", 1))
+
+        await db_repo.bulk_insert("permissions", [
+            {"object_type": "site", "object_id": "s1", "principal_type": "user",
+             "principal_id": f"u{i}", "permission_level": "Read"}
+            for i in range(5)
+        ])
+        ids = []
+        rows, total, cursor = await db_repo.get_permissions_paginated(limit=2)
+        assert total == 5
+        ids += [row["id"] for row in rows]
+        while cursor:
+            rows, _, cursor = await db_repo.get_permissions_paginated(limit=2, after=cursor)
+            ids += [row["id"] for row in rows]
+        assert ids == [5, 4, 3, 2, 1]
+
+    asyncio.run(run())
+
+
+def test_fetch_all_columnar(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [
+            {"site_id": f"s{i}", "url": f"https://t/s{i}", "title": f"Site {i}"} for i in range(3)
+        ])
+        query = "SELECT site_id, title FROM sites ORDER BY id"
+        columns, rows = await db_repo.fetch_all_columnar(query)
+        assert columns == ["site_id", "title"]
+        assert rows == [("s0", "Site 0"), ("s1", "Site 1"), ("s2", "Site 2")]
+        assert await db_repo.fetch_all(query) == [dict(zip(columns, row)) for row in rows]
+        assert await db_repo.fetch_one(query) == {"site_id": "s0", "title": "Site 0"}
+        assert await db_repo.fetch_one("SELECT * FROM sites WHERE id = -1") is None
+
+        assert await db_repo.fetch_columnar(query) == {
+            "site_id": ["s0", "s1", "s2"],
+            "title": ["Site 0", "Site 1", "Site 2"],
+        }
+        assert await db_repo.fetch_columnar("SELECT site_id FROM sites WHERE id = -1") == {"site_id": []}
+
+    asyncio.run(run())
+
+
+def test_bulk_insert_unrolled_groups_and_tail(db_repo):
+    records = [
+        {"object_type": "file", "object_id": f"f{i}", "principal_type": "user",
+         "principal_id": f"u{i}", "permission_level": "Read"}
+        for i in range(1234)
+    ]
+
+    async def run():
+        # 1000-row batches split into 500-row statements, plus a 234-row tail
+        assert await db_repo.bulk_insert("permissions", records, batch_size=1000) == 1234
+        rows = await db_repo.fetch_all("SELECT object_id, principal_id FROM permissions ORDER BY id")
+        assert [(r["object_id"], r["principal_id"]) for r in rows] == [
+            (r["object_id"], r["principal_id"]) for r in records
+        ]
+
+    asyncio.run(run())
+
+
+def test_permissions_paginated_without_join_fanout(db_repo):
+    async def run():
+        # Two levels for one principal on one object must stay two rows
+        await db_repo.bulk_insert("permissions", [
+            {"object_type": "file", "object_id": "f1", "principal_type": "user",
+             "principal_id": "u1", "permission_level": level,
+             "object_name": "doc.txt", "object_path": "/docs/doc.txt"}
+            for level in ("Read", "Edit")
+        ])
+        rows, total, _ = await db_repo.get_permissions_paginated(filters={"object_type": "file"})
+        assert total == 2
+        assert [row["permission_level"] for row in rows] == ["Edit", "Read"]
+        assert all(row["object_path"] == "/docs/doc.txt" for row in rows)
+
+    asyncio.run(run())
+
+
+def test_schema_lookups_cached_until_ddl(db_repo):
+    async def run():
+        assert await db_repo.table_exists("sites")
+        assert not await db_repo.table_exists("scratch")
+        columns = await db_repo.get_table_columns("sites")
+        assert "site_id" in columns
+        assert db_repo._table_columns["sites"] == columns
+
+        await db_repo.execute("CREATE TABLE scratch (id INTEGER PRIMARY KEY, note TEXT)")
+        assert await db_repo.table_exists("scratch")
+        assert await db_repo.get_table_columns("scratch") == ["id", "note"]
+
+        await db_repo.execute("ALTER TABLE scratch ADD COLUMN extra TEXT")
+        assert await db_repo.get_table_columns("scratch") == ["id", "note", "extra"]
+        assert await db_repo.get_table_columns("missing") == []
+        assert "missing" not in db_repo._table_columns
+
+    asyncio.run(run())
+
+
+def test_paginated_total_from_window_column(db_repo):
+    async def run():
+        await db_repo.bulk_insert("permissions", [
+            {"object_type": "site" if i % 2 else "file", "object_id": f"o{i}", "principal_type": "user",
+             "principal_id": f"u{i}", "permission_level": "Read"}
+            for i in range(7)
+        ])
+        rows, total, _ = await db_repo.get_permissions_paginated(limit=2, filters={"object_type": "file"})
+        assert total == 4
+        assert len(rows) == 2
+        assert "_total" not in rows[0]
+
+        # Past the last row there is no row to carry the total
+        rows, total, cursor = await db_repo.get_permissions_paginated(offset=10, limit=2)
+        assert rows == [] and total == 7 and cursor is None
+        rows, total, _ = await db_repo.get_files_paginated()
+        assert rows == [] and total == 0
+
+    asyncio.run(run())
+
+
+def test_set_cache_entries_batch(db_repo):
+    async def run():
+        expires = datetime.now(timezone.utc) + timedelta(hours=1)
+        await db_repo.set_cache_entry("k0", "old", expires)
+        assert await db_repo.set_cache_entries(
+            [(f"k{i}", f"v{i}", expires) for i in range(3)]
+        ) == 3
+        rows = await db_repo.fetch_all("SELECT cache_key, cache_value, expires_at FROM cache_entries ORDER BY cache_key")
+        assert [(r["cache_key"], r["cache_value"]) for r in rows] == [("k0", "v0"), ("k1", "v1"), ("k2", "v2")]
+        assert rows[0]["expires_at"] == expires.isoformat()
+
+    asyncio.run(run())
+
+
+def test_update_audit_run_any_key_order(db_repo):
+    async def run():
+        await db_repo.create_audit_run("run-1")
+        await db_repo.update_audit_run("run-1", {"status": "running", "total_sites": 3})
+        await db_repo.update_audit_run("run-1", {"total_sites": 5, "status": "completed"})
+        row = await db_repo.fetch_one("SELECT status, total_sites FROM audit_runs WHERE run_id = 'run-1'")
+        assert row == {"status": "completed", "total_sites": 5}
+
+    asyncio.run(run())
+
+
+def test_integrity_checks_and_analyze(db_repo):
+    async def run():
+        await db_repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1", "title": "Site 1"}])
+        assert await db_repo.check_integrity()
+        assert await db_repo.check_integrity(fast=False)
+        await db_repo.analyze()
+        await db_repo.full_analyze()
+        stats = await db_repo.fetch_all("SELECT * FROM sqlite_stat1 WHERE tbl = 'sites'")
+        assert stats
+
+    asyncio.run(run())
+
+
+def test_cleanup_expired_cache_entries(db_repo):
+    async def run():
+        now = datetime.now(timezone.utc)
+        await db_repo.set_cache_entries([
+            ("stale", "a", now - timedelta(minutes=5)),
+            ("fresh", "b", now + timedelta(minutes=5)),
+        ])
+        assert await db_repo.cleanup_expired_cache_entries() == 1
+        assert await db_repo.get_cache_entry("stale") is None
+        assert (await db_repo.get_cache_entry("fresh"))["value"] == "b"
+
+    asyncio.run(run())
+
+
+def test_save_checkpoints_bulk(db_repo):
+    async def run():
+        assert await db_repo.save_checkpoints_bulk([]) == 0
+        assert await db_repo.save_checkpoints_bulk(
+            [("run1", f"type{i}", {"n": i}) for i in range(3)]
+        ) == 3
+        checkpoint = await db_repo.get_latest_checkpoint("run1", "type2")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"n": 2}
+
+        # A failing row rolls back the whole batch
+        with pytest.raises(sqlite3.IntegrityError):
+            await db_repo.save_checkpoints_bulk([("run2", "ok", {}), ("run2", None, {})])
+        assert await db_repo.count_rows("audit_checkpoints", "run_id = 'run2'") == 0
+        assert await db_repo.save_checkpoints_bulk([("run2", "ok", b'{"raw": true}')]) == 1
+        checkpoint = await db_repo.get_latest_checkpoint("run2", "ok")
+        assert json.loads(checkpoint["checkpoint_data"]) == {"raw": True}
+
+    asyncio.run(run())
+
+
+def test_bulk_insert_body_runs_on_writer_thread(db_repo):
+    threads = set()
+
+    def records():
+        for i in range(3):
+            threads.add(threading.current_thread().name)
+            yield {"object_type": "file", "object_id": f"f{i}", "principal_type": "user",
+                   "principal_id": "u1", "permission_level": "Read"}
+
+    async def run():
+        assert await db_repo.bulk_insert("permissions", records()) == 3
+        # The first record is peeked on the caller; the rest load on the writer
+        assert "sqlite-writer" in threads
+        assert await db_repo.count_rows("permissions") == 3
+        db_repo.close()
+        assert db_repo._writer_thread is None
+
+    asyncio.run(run())
+
+
+def test_migration_backfills_permission_objects(db_repo):
+    def downgrade():
+        # The pre-migration schema: no object columns, views joining for them
+        with sqlite3.connect(db_repo.db_path) as db:
+            for view in ("vw_permission_summary", "vw_external_permissions"):
+                db.execute(f"DROP VIEW {view}")
+            db.execute("ALTER TABLE permissions DROP COLUMN object_name")
+            db.execute("ALTER TABLE permissions DROP COLUMN object_path")
+            db.execute(
+                "CREATE VIEW vw_permission_summary AS SELECT p.object_type, s.title AS object_name"
+                " FROM permissions p LEFT JOIN sites s ON p.object_id = s.site_id"
+            )
+            db.execute("INSERT INTO sites (site_id, url, title) VALUES ('s1', 'https://t/s1', 'Site 1')")
+            db.execute(
+                "INSERT INTO permissions (object_type, object_id, principal_type, principal_id,"
+                " permission_level) VALUES ('site', 's1', 'user', 'u1', 'Read')"
+            )
+
+    async def run():
+        await asyncio.to_thread(downgrade)
+        await db_repo.initialize_database()
+        rows = await db_repo.fetch_all(
+            "SELECT object_name, object_path, principal_id FROM vw_permission_summary"
+        )
+        assert rows == [{"object_name": "Site 1", "object_path": "https://t/s1", "principal_id": "u1"}]
+
+    asyncio.run(run())
+
+
+def test_summary_iterator_does_not_hold_pool_connection(tmp_path):
+    repo = DatabaseRepository(str(tmp_path / "one.db"), pool_size=1)
+    repo._pool.timeout = 2
+
+    async def run():
+        await repo.initialize_database()
+        await repo.bulk_insert("sites", [{"site_id": "s1", "url": "https://t/s1"}])
+        await repo.bulk_insert("permissions", [
+            {"object_type": "site", "object_id": "s1", "principal_type": "user",
+             "principal_id": f"u{i}", "permission_level": "Read"}
+            for i in range(5)
+        ])
+        summary = repo.iter_permission_summary(chunk_size=2)
+        first = await summary.__anext__()
+        # The suspended iterator leaves the only connection free
+        site = await asyncio.wait_for(repo.get_site("s1"), timeout=1)
+        assert site["site_id"] == "s1"
+        rest = [r["principal_id"] async for r in summary]
+        assert [first["principal_id"]] + rest == [f"u{i}" for i in range(5)]
+
+    asyncio.run(run())
+    repo.close()